@@ -0,0 +1,237 @@
+import argparse
+import asyncio
+import io
+import json
+import platform
+import sys
+import timeit
+import warnings
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+from dataclasses import dataclass as std_dataclass
+
+import cattrs
+
+from ch6.random_wikipedia_article import (
+    Article,
+    create_client,
+    fetch,
+    fetch_many,
+    show,
+    show2,
+)
+from ch6.standin import serve
+from ch9.formatter import frobnicate
+from ch9.hashing import hash_many
+from ch10.codegen import dataclass
+from ch10.converter import registry
+
+# 一个简单的基准测试工具，对热点路径进行计时，把结果保存为JSON，并和之前保存的基线进行比较
+# python -m benchmarks.run --save results.json
+# python -m benchmarks.run --compare benchmarks/baseline.json --threshold 0.2
+# 如果有某项比基线慢了超过threshold，则以非0状态码退出，可以在CI中使用
+
+ARTICLE = Article(
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit",
+    "Nulla mattis volutpat sapien, at dapibus ipsum accumsan eu. " * 8,
+)
+DATA = {"title": ARTICLE.title, "extract": ARTICLE.summary}
+
+# 每个基准测试是一个生成器，yield要计时的函数，yield前后可以准备和释放资源（client，警告过滤器等）
+type Setup = Callable[[str], AbstractContextManager[Callable[[], object]]]
+
+BENCHMARKS: dict[str, Setup] = {}
+
+
+def benchmark(name: str):
+    def register(setup: Callable[[str], Iterator[Callable[[], object]]]) -> Setup:
+        BENCHMARKS[name] = contextmanager(setup)
+        return BENCHMARKS[name]
+
+    return register
+
+
+@benchmark("fetch_cold_client")
+def bench_fetch_cold(url):
+    yield lambda: fetch(url)
+
+
+@benchmark("fetch_reused_client")
+def bench_fetch_reused(url):
+    with create_client() as client:
+        yield lambda: fetch(url, client)
+
+
+# 100个请求，最多10个并发，用来测试异步的fetch路径
+@benchmark("fetch_many_x100")
+def bench_fetch_many(url):
+    async def collect():
+        return [article async for article in fetch_many(url, 100)]
+
+    yield lambda: asyncio.run(collect())
+
+
+@benchmark("show")
+def bench_show(url):
+    yield lambda: show(ARTICLE, io.StringIO())
+
+
+@benchmark("show2")
+def bench_show2(url):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        yield lambda: show2(ARTICLE, io.StringIO())
+
+
+# fetch2使用全局的cattrs.structure，fetch3使用注册了override的转换器
+@benchmark("structure_cattrs_global")
+def bench_structure_global(url):
+    data = {"title": ARTICLE.title, "summary": ARTICLE.summary}
+    yield lambda: cattrs.structure(data, Article)
+
+
+@benchmark("structure_registry")
+def bench_structure_registry(url):
+    yield lambda: registry.structure(DATA, Article)
+
+
+@benchmark("structure_many_registry_x100")
+def bench_structure_many(url):
+    items = [DATA] * 100
+    yield lambda: registry.structure_many(items, Article)
+
+
+@benchmark("init_stdlib_dataclass")
+def bench_init_stdlib(url):
+    @std_dataclass
+    class Point:
+        x: int
+        y: int = 0
+
+    yield lambda: Point(1, 2)
+
+
+@benchmark("init_ch10_dataclass")
+def bench_init_ch10(url):
+    @dataclass(slots=True)
+    class Point:
+        x: int
+        y: int = 0
+
+    yield lambda: Point(1, 2)
+
+
+SUMMARIES = [f"{ARTICLE.summary} {i}" for i in range(1000)]
+
+
+@benchmark("frobnicate_loop_x1000")
+def bench_frobnicate(url):
+    yield lambda: [frobnicate(summary) for summary in SUMMARIES]
+
+
+@benchmark("hash_many_x1000")
+def bench_hash_many(url):
+    yield lambda: hash_many(SUMMARIES)
+
+
+# 短的输入中创建hash对象和函数调用的开销占的比例最大
+SHORT_VALUES = [f"value {i}" for i in range(10_000)]
+
+
+@benchmark("frobnicate_loop_short_x10000")
+def bench_frobnicate_short(url):
+    yield lambda: [frobnicate(value) for value in SHORT_VALUES]
+
+
+@benchmark("hash_many_short_x10000")
+def bench_hash_many_short(url):
+    yield lambda: hash_many(SHORT_VALUES)
+
+
+# 每一对中前一项必须比后一项快，否则以非0状态码退出
+SPEEDUPS = [("hash_many_short_x10000", "frobnicate_loop_short_x10000")]
+
+
+def measure(fn: Callable[[], object], repeat: int) -> dict[str, float]:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    timings = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {"min": min(timings), "mean": sum(timings) / len(timings)}
+
+
+def run(names: list[str], repeat: int) -> dict[str, dict[str, float]]:
+    results = {}
+    with serve([ARTICLE]) as server:
+        for name in names:
+            with BENCHMARKS[name](server.url) as fn:
+                results[name] = measure(fn, repeat)
+    return results
+
+
+# 使用最小值进行比较，因为它受到系统噪声的影响最小
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["min"] / baseline[name]["min"]
+        status = "REGRESSION" if ratio > 1 + threshold else "ok"
+        print(f"{name:32} {ratio:6.2f}x  {status}")
+        if status != "ok":
+            regressions.append(name)
+    return regressions
+
+
+def check_speedups(results: dict[str, dict[str, float]]) -> list[str]:
+    failures = []
+    for fast, slow in SPEEDUPS:
+        if fast not in results or slow not in results:
+            continue
+        ratio = results[slow]["min"] / results[fast]["min"]
+        status = "ok" if ratio > 1 else "NOT FASTER"
+        print(f"{fast} vs {slow}: {ratio:.2f}x  {status}")
+        if status != "ok":
+            failures.append(fast)
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks")
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="baseline JSON to compare")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="allowed slowdown relative to the baseline (default: 0.2)",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.names or list(BENCHMARKS), args.repeat)
+    for name, result in results.items():
+        print(f"{name:32} {result['min'] * 1e6:12.2f} us")
+
+    failed = check_speedups(results)
+
+    if args.save:
+        report = {"python": platform.python_version(), "results": results}
+        with open(args.save, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# 使用python -X importtime统计命令行工具的入口模块的导入耗时，超过预算或者导入了重量级的模块则以非0状态码退出
+# python -m benchmarks.startup
+# python -m benchmarks.startup ch6 --budget 50
+
+ROOT = Path(__file__).parent.parent
+
+# 名称: (加入PYTHONPATH的目录, 模块名, 导入耗时预算（毫秒）)
+TARGETS = {
+    "ch4": ("ch4", "random_wikipedia_article", 20.0),
+    "ch6": (".", "ch6.random_wikipedia_article", 60.0),
+}
+
+# 这些模块应该只在真正用到的时候才导入
+HEAVY_MODULES = ("httpx", "h2", "rich", "asyncio", "importlib.metadata")
+
+
+def import_times(path: str, module: str) -> dict[str, int]:
+    env = {**os.environ, "PYTHONPATH": str(ROOT / path)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # 每一行的格式是：import time: self [us] | cumulative | imported package
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times.setdefault(name.strip(), int(cumulative))
+    return times
+
+
+def measure(name: str, runs: int) -> tuple[float, list[str]]:
+    path, module, _ = TARGETS[name]
+    # 取多次运行中的最小值，减少磁盘缓存和系统噪声的影响
+    samples = [import_times(path, module) for _ in range(runs)]
+    elapsed = min(times[module] for times in samples) / 1000
+    heavy = [module for module in HEAVY_MODULES if module in samples[0]]
+    return elapsed, heavy
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.startup")
+    parser.add_argument("names", nargs="*", help="entry points (default: all)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget", type=float, help="import time budget in milliseconds"
+    )
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name in args.names or list(TARGETS):
+        elapsed, heavy = measure(name, args.runs)
+        budget = args.budget or TARGETS[name][2]
+        ok = elapsed <= budget and not heavy
+        failed = failed or not ok
+        status = "ok" if ok else "OVER BUDGET"
+        print(f"{name:8} {elapsed:8.1f} ms  (budget {budget:.0f} ms)  {status}")
+        if heavy:
+            print(f"         eagerly imports: {', '.join(heavy)}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import inspect
+import sys
+import types
+from collections.abc import Callable, Sequence
+from typing import Any, dataclass_transform, overload
+
+# 通过运行时获取的类型标注，我们可以实现一个自己的dataclass：根据字段生成方法的源码，然后使用exec编译它
+
+# 生成的代码只和字段名有关，和字段的类型无关，所以字段名相同的类可以共用编译好的code object，不需要再exec
+# 类型标注会直接设置到生成的函数的__annotations__中
+_code_cache: dict[tuple[str, tuple[str, ...]], types.CodeType] = {}
+
+MISSING = object()
+
+
+def build_init[T](cls: type[T]) -> str:
+    return _init_source(tuple(inspect.get_annotations(cls)))
+
+
+def _init_source(names: Sequence[str]) -> str:
+    args = ", ".join(["self", *names])
+    body = "\n".join(f"    self.{name} = {name}" for name in names) or "    pass"
+    return f"def __init__({args}):\n{body}"
+
+
+def _eq_source(names: Sequence[str]) -> str:
+    fields = "".join(f"self.{name}, " for name in names)
+    other = "".join(f"other.{name}, " for name in names)
+    return (
+        "def __eq__(self, other):\n"
+        "    if other.__class__ is not self.__class__:\n"
+        "        return NotImplemented\n"
+        f"    return ({fields}) == ({other})"
+    )
+
+
+def _repr_source(names: Sequence[str]) -> str:
+    fields = ", ".join(f"{name}={{self.{name}!r}}" for name in names)
+    return (
+        f'def __repr__(self):\n    return f"{{self.__class__.__qualname__}}({fields})"'
+    )
+
+
+def _hash_source(names: Sequence[str]) -> str:
+    fields = "".join(f"self.{name}, " for name in names)
+    return f"def __hash__(self):\n    return hash(({fields}))"
+
+
+def _make_method(
+    cls: type[Any],
+    name: str,
+    names: tuple[str, ...],
+    build_source: Callable[[Sequence[str]], str],
+) -> types.FunctionType:
+    key = (name, names)
+    code = _code_cache.get(key)
+    if code is None:
+        locals: dict[str, Any] = {}
+        # compile source code on the fly
+        exec(build_source(names), {}, locals)
+        code = locals[name].__code__
+        _code_cache[key] = code
+    globals = sys.modules[cls.__module__].__dict__
+    method = types.FunctionType(code, globals, name)
+    method.__qualname__ = f"{cls.__qualname__}.{name}"
+    method.__module__ = cls.__module__
+    return method
+
+
+def _add_slots[T](cls: type[T], names: tuple[str, ...]) -> type[T]:
+    # __slots__必须在创建类的时候指定，所以要用原来的类的属性重新创建一个类
+    # 类属性会和同名的slot冲突，所以要先把字段的默认值去掉
+    namespace = {
+        key: value
+        for key, value in cls.__dict__.items()
+        if key not in (*names, "__dict__", "__weakref__")
+    }
+    namespace["__slots__"] = names
+    new_cls = type(cls)(cls.__name__, cls.__bases__, namespace)
+    # __qualname__保存在类型上，不在__dict__中，要单独恢复，否则函数或类中定义的类的repr会不对
+    new_cls.__qualname__ = cls.__qualname__
+    # 使用了无参数的super()或者__class__的方法，闭包中的__class__指向的还是原来的类，要改为新的类
+    for value in new_cls.__dict__.values():
+        _update_class_cell(value, cls, new_cls)
+    return new_cls
+
+
+def _update_class_cell(value: Any, old: type[Any], new: type[Any]) -> None:
+    if isinstance(value, (classmethod, staticmethod)):
+        value = value.__func__
+    elif isinstance(value, property):
+        for accessor in (value.fget, value.fset, value.fdel):
+            _update_class_cell(accessor, old, new)
+        return
+    value = inspect.unwrap(value) if callable(value) else value
+    if not isinstance(value, types.FunctionType):
+        return
+    if "__class__" in value.__code__.co_freevars and value.__closure__:
+        index = value.__code__.co_freevars.index("__class__")
+        cell = value.__closure__[index]
+        if cell.cell_contents is old:
+            cell.cell_contents = new
+
+
+@overload
+def dataclass[T](cls: type[T], /) -> type[T]: ...
+
+
+@overload
+def dataclass[T](
+    *,
+    eq: bool = ...,
+    repr: bool = ...,
+    hash: bool = ...,
+    slots: bool = ...,
+    match_args: bool = ...,
+) -> Callable[[type[T]], type[T]]: ...
+
+
+# @dataclass_transform装饰器告诉类型检查器这个装饰器会改变类的行为，从而让类型检查器理解这个装饰器的作用
+@dataclass_transform()
+def dataclass[T](
+    cls: type[T] | None = None,
+    /,
+    *,
+    eq: bool = False,
+    repr: bool = False,
+    hash: bool = False,
+    slots: bool = False,
+    match_args: bool = False,
+) -> type[T] | Callable[[type[T]], type[T]]:
+    def wrap(cls: type[T]) -> type[T]:
+        annotations = inspect.get_annotations(cls)
+        names = tuple(annotations)
+        defaults = [cls.__dict__.get(name, MISSING) for name in names]
+        first_default = next(
+            (i for i, default in enumerate(defaults) if default is not MISSING),
+            len(names),
+        )
+        if any(default is MISSING for default in defaults[first_default:]):
+            raise TypeError(f"non-default field follows default field in {cls!r}")
+
+        if slots:
+            cls = _add_slots(cls, names)
+
+        init = _make_method(cls, "__init__", names, _init_source)
+        init.__defaults__ = tuple(defaults[first_default:]) or None
+        init.__annotations__ = {**annotations, "return": None}
+        setattr(cls, "__init__", init)
+
+        if eq:
+            setattr(cls, "__eq__", _make_method(cls, "__eq__", names, _eq_source))
+        if repr:
+            setattr(cls, "__repr__", _make_method(cls, "__repr__", names, _repr_source))
+        if hash:
+            setattr(cls, "__hash__", _make_method(cls, "__hash__", names, _hash_source))
+        elif eq:
+            # 和标准库的dataclass一样，定义了__eq__但没有__hash__的类是不可哈希的
+            setattr(cls, "__hash__", None)
+        if match_args:
+            setattr(cls, "__match_args__", names)
+        return cls
+
+    if cls is None:
+        return wrap
+    return wrap(cls)
@@ -0,0 +1,73 @@
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any
+
+import cattrs
+import cattrs.gen
+
+# cattrs.gen没有在__all__中导出AttributeOverride，类型检查器只认定义它的模块
+from cattrs.gen._consts import AttributeOverride
+
+from ch6.random_wikipedia_article import Article
+
+# cattrs.structure每次调用都要先根据类型查找hook，再由hook处理数据
+# 对于热点路径，可以预先为每个类型生成structure/unstructure函数并缓存起来，之后直接调用生成的函数
+# 注意registry.structure每次也要查一次字典，单个对象并不比cattrs.structure快，
+# 要么在热点路径中保存structure_fn返回的函数直接调用，要么使用structure_many批量转换
+# 关闭detailed_validation之后，生成的代码不会收集每个字段的错误信息，速度更快
+
+# 生成的函数接收的数据可以是任何解码之后的JSON值（如ch10.type_annotation.JSON），由它自己检查
+type StructureFn[T] = Callable[[Any, type[T]], T]
+type UnstructureFn[T] = Callable[[T], dict[str, Any]]
+
+
+class ConverterRegistry:
+    def __init__(self, detailed_validation: bool = False) -> None:
+        self.converter = cattrs.Converter(detailed_validation=detailed_validation)
+        self._structure_fns: dict[type[Any], StructureFn[Any]] = {}
+        self._unstructure_fns: dict[type[Any], UnstructureFn[Any]] = {}
+
+    # 使用override可以处理json字段名和类的字段名不一致的情况，如summary=cattrs.gen.override(rename="extract")
+    def register[T](self, cls: type[T], **overrides: AttributeOverride) -> None:
+        structure_fn = cattrs.gen.make_dict_structure_fn(
+            cls, self.converter, **overrides
+        )
+        unstructure_fn = cattrs.gen.make_dict_unstructure_fn(
+            cls, self.converter, **overrides
+        )
+        self.converter.register_structure_hook(cls, structure_fn)
+        self.converter.register_unstructure_hook(cls, unstructure_fn)
+        self._structure_fns[cls] = structure_fn
+        self._unstructure_fns[cls] = unstructure_fn
+
+    def structure_fn[T](self, cls: type[T]) -> StructureFn[T]:
+        if cls not in self._structure_fns:
+            self.register(cls)
+        return self._structure_fns[cls]
+
+    def unstructure_fn[T](self, cls: type[T]) -> UnstructureFn[T]:
+        if cls not in self._unstructure_fns:
+            self.register(cls)
+        return self._unstructure_fns[cls]
+
+    def structure[T](self, data: Mapping[str, Any], cls: type[T]) -> T:
+        return self.structure_fn(cls)(data, cls)
+
+    def unstructure[T](self, obj: T) -> dict[str, Any]:
+        return self.unstructure_fn(type(obj))(obj)
+
+    # 批量处理的时候只查找一次生成的函数
+    def structure_many[T](
+        self, items: Iterable[Mapping[str, Any]], cls: type[T]
+    ) -> list[T]:
+        fn = self.structure_fn(cls)
+        return [fn(data, cls) for data in items]
+
+    def unstructure_many[T](
+        self, objs: Iterable[T], cls: type[T]
+    ) -> list[dict[str, Any]]:
+        fn = self.unstructure_fn(cls)
+        return [fn(obj) for obj in objs]
+
+
+registry = ConverterRegistry()
+registry.register(Article, summary=cattrs.gen.override(rename="extract"))
@@ -1,14 +1,13 @@
 import inspect
-import json
-import sys
 from urllib import request
-from typing import dataclass_transform
 
 import cattrs
-import cattrs.gen
 from attrs import Factory, asdict, define
 
+from ch6 import decoder
+from ch6.cache import ResponseCache, urlopen_cached
 from ch6.random_wikipedia_article import Article
+from ch10.converter import registry
 from ch10.type_annotation import JSON
 
 # Python的静态类型检查器首选mypy，下面的代码会让mypy报错
@@ -68,38 +67,26 @@ print(SomeClass())
 
 
 # 这两个模块给我们的启发是：通过运行时获取的类型标注，我们可以实现一个自己的dataclass。
+# 实现在ch10/codegen.py中：它根据字段名生成__init__等方法的源码并用exec编译，
+# 还可以按需生成__eq__，__repr__，__hash__，__match_args__和__slots__，
+# 字段名相同的类会共用编译好的code object
+from ch10.codegen import dataclass
 
 
-# @dataclass_transform装饰器告诉类型检查器这个装饰器会改变类的行为，从而让类型检查器理解这个装饰器的作用
-@dataclass_transform()
-def dataclass[T](cls: type[T]) -> type[T]:
-    source_code = build_init(cls)
-    globals = sys.modules[cls.__module__].__dict__
-    locals = {}
-    # compile source code on the fly
-    exec(source_code, globals, locals)
+@dataclass(eq=True, repr=True, slots=True, match_args=True)
+class Point:
+    x: int
+    y: int = 0
 
-    cls.__init__ = locals["__init__"]
-    return cls
 
-
-def build_init[T](cls: type[T]) -> str:
-    annotations = inspect.get_annotations(cls)
-    args: list[str] = ["self"]
-    body: list[str] = []
-    for name, typ in annotations.items():
-        args.append(f"{name}: {typ.__name__}")
-        body.append(f"    self.{name} = {name}")
-    args_str = ", ".join(args)
-    body_str = "\n".join(body)
-    init_str = "def __init__({}) -> None:\n{}".format(args_str, body_str)
-    return init_str
+print(Point(1), Point(1) == Point(1, 0))
+# Point(x=1, y=0) True
 
 
 # 类型信息还可以用来进行运行时类型检查
 def fetch(url: str) -> Article:
     with request.urlopen(url) as response:
-        data: JSON = json.load(response)
+        data: JSON = decoder.loads(response.read())
     # 使用结构模式匹配
     match data:
         case {"title": str(title), "extract": str(extract)}:
@@ -116,34 +103,42 @@ def fetch2(url: str) -> Article:
     req = request.Request(url, headers=headers)
 
     with request.urlopen(req) as response:
-        data: JSON = json.load(response)
+        data: JSON = decoder.loads(response.read())
     return cattrs.structure(data, Article)
 
 
 # 如果json的字段名和类的字段名不一致，也可以使用cattrs的转换器来处理：
-
-converter = cattrs.Converter()
-converter.register_structure_hook(
-    Article,
-    cattrs.gen.make_dict_structure_fn(
-        Article,
-        converter,
-        summary=cattrs.gen.override(rename="extract"),
-    ),
-)
-
-
-def fetch3(url: str) -> Article:
+# converter = cattrs.Converter()
+# converter.register_structure_hook(
+#     Article,
+#     cattrs.gen.make_dict_structure_fn(
+#         Article,
+#         converter,
+#         summary=cattrs.gen.override(rename="extract"),
+#     ),
+# )
+# ch10/converter.py把这种做法封装成了一个registry，它会缓存为每个类型生成的函数，还支持批量转换
+# 单个对象通过registry.structure转换和cattrs.structure一样快，省掉的只是查找hook的开销，
+# 所以这里在导入的时候取出生成的函数，之后直接调用它
+_structure_article = registry.structure_fn(Article)
+
+
+def fetch3(url: str, cache: ResponseCache | None = None) -> Article:
     headers = {
         "User-Agent": "RandomWiki/1.0 (Contact: zjjblue@gmail.com)",
     }
     req = request.Request(url, headers=headers)
 
+    if cache is not None:
+        data: JSON = decoder.loads(urlopen_cached(req, cache))
+        return _structure_article(data, Article)
+
     with request.urlopen(req) as response:
-        data: JSON = json.load(response)
-    return converter.structure(data, Article)
+        data = decoder.loads(response.read())
+    return _structure_article(data, Article)
 
 
-print(fetch3("https://en.wikipedia.org/api/rest_v1/page/random/summary"))
+if __name__ == "__main__":
+    print(fetch3("https://en.wikipedia.org/api/rest_v1/page/random/summary"))
 # cattrs的优点是：把序列化和反序列化的逻辑和数据模型分离开来，使得代码更清晰易懂，
 # 并且还可以用于dataclasses, attrs-classes, named tuples, typed dicts和一般的类型如tuple[str, int].
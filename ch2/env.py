@@ -51,6 +51,10 @@ distributions = importlib.metadata.distributions()
 for distribution in sorted(distributions, key=lambda d: d.name):
     print(f"{distribution.name:30} {distribution.version}")
 
+# 上面的两个循环在安装了很多包的环境中会很慢：find_spec是串行调用的，每个包的元数据都要读取并解析
+# ch2/inventory.py中有一个更快的版本，它只读取元数据开头的Name和Version，
+# 并且会缓存结果，可以使用python -m ch2.inventory以JSON格式输出
+
 # per-user环境是可以用于为当前用户安装第三方库，但很少会用到它，因为它有下面几个缺点：
 # 1. 它没有和全局环境隔离，所以还是可以引入系统级的第三方库，如果它没被per-user的覆盖的话
 # 2. per-user环境之间也没有隔离
@@ -0,0 +1,143 @@
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import platform
+import re
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, Optional
+
+# 环境清单：标准库模块的位置和已安装的第三方包，以JSON格式输出
+# python -m ch2.inventory > report.json
+#
+# 1. find_spec在调用每个finder的时候都持有全局的导入锁，使用线程池并行查找反而更慢，所以串行查找
+# 2. 第三方包的名称和版本只读取METADATA开头的几行，不用importlib.metadata解析整个文件
+# 3. 安装或删除包都会修改sys.path中对应目录的mtime，所以用它们作为缓存的key，没有变化的时候直接使用上次的结果
+
+# 按照规范，.dist-info目录的名称是{name}-{version}.dist-info，其中name是规范化之后的名称，
+# 如pytest_httpserver，和env.py打印的pytest-httpserver不同，所以只在没有METADATA的时候使用
+DIST_INFO = re.compile(r"^(?P<name>[^-]+)-(?P<version>[^-]+)\.dist-info$")
+# 报告的内容变化之后（如包名改为使用METADATA中的Name）修改这个值，旧的缓存就会失效
+FORMAT = 2
+
+
+def find_origin(name: str) -> Optional[str]:
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    return spec.origin if spec else None
+
+
+def stdlib_modules() -> dict[str, str]:
+    origins = {name: find_origin(name) for name in sorted(sys.stdlib_module_names)}
+    return {name: origin for name, origin in origins.items() if origin}
+
+
+# Name和Version在元数据的开头，读到它们或者读到空行（头部结束）就停止
+def read_header(path: Path) -> dict[str, str]:
+    fields: dict[str, str] = {}
+    with open(path, encoding="utf-8", errors="replace") as file:
+        for line in file:
+            key, sep, value = line.partition(":")
+            if not sep:
+                break
+            if key in ("Name", "Version"):
+                fields[key.lower()] = value.strip()
+                if len(fields) == 2:
+                    break
+    return fields
+
+
+def distributions(path: Optional[list[str]] = None) -> Iterator[dict[str, str]]:
+    for entry in path if path is not None else sys.path:
+        if not os.path.isdir(entry):
+            continue
+        for child in sorted(os.listdir(entry)):
+            if child.endswith(".dist-info"):
+                metadata = Path(entry, child, "METADATA")
+            elif child.endswith(".egg-info"):
+                metadata = Path(entry, child, "PKG-INFO")
+            else:
+                continue
+            try:
+                fields = read_header(metadata)
+            except OSError:
+                fields = {}
+            if "name" not in fields or "version" not in fields:
+                match = DIST_INFO.match(child)
+                if match is None:
+                    continue
+                fields = {**match.groupdict(), **fields}
+            yield {"name": fields["name"], "version": fields["version"]}
+
+
+def build_report() -> dict[str, Any]:
+    return {
+        "python": {
+            "version": platform.python_version(),
+            "implementation": sys.implementation.name,
+            "executable": sys.executable,
+            "prefix": sys.prefix,
+        },
+        "stdlib": stdlib_modules(),
+        "distributions": sorted(distributions(), key=lambda d: d["name"].lower()),
+    }
+
+
+def cache_key() -> list[tuple[str, str | float]]:
+    key: list[tuple[str, str | float]] = [
+        ("format", FORMAT),
+        ("executable", sys.executable),
+    ]
+    for entry in sys.path:
+        try:
+            key.append((entry, os.stat(entry or ".").st_mtime))
+        except OSError:
+            key.append((entry, 0.0))
+    return key
+
+
+def default_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "env-report"
+
+
+def inventory(cache_dir: Optional[Path] = None) -> dict[str, Any]:
+    if cache_dir is None:
+        return build_report()
+
+    # 每个解释器对应一个缓存文件
+    digest = hashlib.sha256(sys.executable.encode()).hexdigest()[:16]
+    cache_file = cache_dir / f"{digest}.json"
+    key = json.loads(json.dumps(cache_key()))
+    try:
+        cached = json.loads(cache_file.read_text())
+        if cached["key"] == key:
+            report: dict[str, Any] = cached["report"]
+            return report
+    except (OSError, ValueError, KeyError):
+        pass
+
+    report = build_report()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    cache_file.write_text(json.dumps({"key": key, "report": report}))
+    return report
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="env-report")
+    parser.add_argument("--cache-dir", type=Path, default=default_cache_dir())
+    parser.add_argument("--no-cache", action="store_true", help="ignore the cache")
+    args = parser.parse_args(argv)
+
+    report = inventory(None if args.no_cache else args.cache_dir)
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
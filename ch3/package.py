@@ -9,11 +9,63 @@
 # 3. 前端导入后端用于打包的模块或者对象，然后调用其中的方法进行打包工作
 
 # 下面是模拟后端进行build的代码
+# python package.py [项目目录 ...]，默认是当前目录，多个项目会在不同的进程中并行build
+# 对源码和pyproject.toml的内容计算hash，如果和dist中上一次build的wheel的hash一致，则跳过build
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
 import hatchling.build as backend
 
-requires = backend.get_requires_for_build_wheel()
-print(f"requires: {requires}")
-backend.build_wheel("dist")
+STAMP = ".fingerprint.json"
+IGNORED_DIRS = {"dist", "build", "__pycache__"}
+
+
+def fingerprint(project: Path) -> str:
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(project):
+        # 原地修改dirs可以让os.walk跳过这些目录，排序则保证遍历的顺序是确定的
+        dirs[:] = sorted(
+            d for d in dirs if d not in IGNORED_DIRS and not d.startswith(".")
+        )
+        for name in sorted(files):
+            if name.startswith(".") or name.endswith(".pyc"):
+                continue
+            path = Path(root, name)
+            digest.update(path.relative_to(project).as_posix().encode() + b"\0")
+            digest.update(path.read_bytes() + b"\0")
+    return digest.hexdigest()
+
+
+def build(project: Path) -> str:
+    dist = project / "dist"
+    stamp = dist / STAMP
+    current = fingerprint(project)
+    try:
+        last = json.loads(stamp.read_text())
+        if last["fingerprint"] == current and (dist / last["wheel"]).exists():
+            return f"{project}: up to date ({last['wheel']})"
+    except (OSError, ValueError, KeyError):
+        pass
+
+    # 后端总是build当前目录的项目，每个项目都在单独的进程中build，所以可以切换工作目录
+    os.chdir(project)
+    requires = backend.get_requires_for_build_wheel()
+    print(f"{project}: requires: {requires}")
+    wheel = backend.build_wheel("dist")
+    stamp.write_text(json.dumps({"fingerprint": current, "wheel": wheel}))
+    return f"{project}: built {wheel}"
+
+
+def main(projects: list[str]):
+    paths = [Path(project).resolve() for project in projects or ["."]]
+    with ProcessPoolExecutor(max_workers=len(paths)) as executor:
+        for result in executor.map(build, paths):
+            print(result)
+
 
 # 可以使用Twine来publish到PyPi，可以使用TestPyPI，一个PyPI的用于测试的实例
 # 下面的命令上传build产物
@@ -32,3 +84,7 @@ backend.build_wheel("dist")
 # pip，uv，pipx都支持--editable（-e）参数
 
 # 如果是extension module的作者，可以参考cibuildwheel这个库，看它是如何build，测试多平台兼容性和CI/CD的
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,43 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from hatchling.builders.hooks.plugin.interface import BuildHookInterface
+
+# hatchling的自定义构建钩子，在pyproject.toml中使用[tool.hatch.build.hooks.custom]启用，默认使用这个文件
+# 构建的时候把项目的名称，版本和联系方式写入一个模块，并打包进wheel，
+# 这样运行时build_user_agent就不需要使用importlib.metadata读取元数据了
+
+MODULE = "_random_wikipedia_article_version.py"
+
+TEMPLATE = """\
+# 这个文件是构建的时候由hatch_build.py生成的
+NAME = {name!r}
+VERSION = {version!r}
+CONTACT = {contact!r}
+USER_AGENT = {user_agent!r}
+"""
+
+
+class CustomBuildHook(BuildHookInterface):
+    def initialize(self, version, build_data):
+        core = self.metadata.core
+        name, version = core.raw_name, self.metadata.version
+        contact = ", ".join(
+            author["email"] for author in core.authors if "email" in author
+        )
+        source = TEMPLATE.format(
+            name=name,
+            version=version,
+            contact=contact,
+            user_agent=f"{name}/{version} (Contact: {contact})",
+        )
+
+        # 生成的文件不放在源码目录中，以免污染工作区
+        self._tempdir = tempfile.mkdtemp()
+        path = Path(self._tempdir) / MODULE
+        path.write_text(source)
+        build_data["force_include"][str(path)] = MODULE
+
+    def finalize(self, version, build_data, artifact_path):
+        shutil.rmtree(self._tempdir, ignore_errors=True)
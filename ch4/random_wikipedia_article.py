@@ -1,33 +1,66 @@
-import httpx
+import functools
 import sys
-from rich.console import Console
-
-if sys.version_info >= (3, 8):
-    from importlib.metadata import metadata
-else:
-    from importlib_metadata import metadata
 
 API_URL = "https://en.wikipedia.org/api/rest_v1/page/random/summary"
 
 USER_AGENT = "{Name}/{Version} (Contact: {Author-email})"
 
+# httpx，rich和importlib.metadata都比较重，只在用到的时候导入，这样可以减少命令行工具启动的时间
+
 
+# 读取元数据需要遍历sys.path并解析磁盘上的METADATA文件，所以结果会被缓存，每个进程只读取一次
+# 从wheel安装的时候，构建钩子（见hatch_build.py）已经把User-Agent写入了一个模块，不需要读取元数据
+@functools.cache
 def build_user_agent():
+    try:
+        from _random_wikipedia_article_version import USER_AGENT as user_agent
+    except ModuleNotFoundError:
+        pass
+    else:
+        return user_agent
+
+    if sys.version_info >= (3, 8):
+        from importlib.metadata import metadata
+    else:
+        from importlib_metadata import metadata
+
     fields = metadata("random-wikipedia-article")
     return USER_AGENT.format_map(fields)
 
 
-def main():
+def main(argv=None):
+    import argparse
+    import json
+
+    import httpx
+
+    parser = argparse.ArgumentParser(prog="random-wikipedia-article")
+    parser.add_argument("--count", type=int, default=1, help="number of articles")
+    parser.add_argument(
+        "--jsonl", action="store_true", help="write articles as JSON Lines"
+    )
+    args = parser.parse_args(argv)
+
     headers = {"User-Agent": build_user_agent()}
+    console = None
+    if not args.jsonl:
+        from rich.console import Console
+
+        console = Console(width=72, highlight=False)
 
     with httpx.Client(headers=headers, http2=True) as client:
-        response = client.get(API_URL, follow_redirects=True)
-        response.raise_for_status()
-        data = response.json()
+        for _ in range(args.count):
+            response = client.get(API_URL, follow_redirects=True)
+            response.raise_for_status()
+            data = response.json()
 
-    console = Console(width=72, highlight=False)
-    console.print(data["title"], style="bold", end="\n\n")
-    console.print(data["extract"])
+            if console is None:
+                record = {"title": data["title"], "summary": data["extract"]}
+                sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+                sys.stdout.flush()
+            else:
+                console.print(data["title"], style="bold", end="\n\n")
+                console.print(data["extract"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,178 @@
+import bisect
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Optional, overload
+
+from ch6.random_wikipedia_article import Article
+
+# 只读的文章归档文件，用mmap打开，多个进程打开同一个文件的时候共享操作系统的页缓存
+# 把一个包含大量文章的JSON列表加载成Article，每个进程都要花几秒钟和几个G的内存，
+# 而打开归档文件只需要读取文件头，访问哪篇文章才会读入哪些页
+#
+# 文件格式（字节序和写入的机器相同，打开的时候会检查）：
+#   文件头：magic，版本，字节序标记，文章数，各个区域的位置
+#   字符串区：每篇文章依次是4字节的标题长度，UTF-8的标题，4字节的摘要长度，UTF-8的摘要
+#   偏移索引：每篇文章在字符串区中的位置（8字节），按下标随机访问是O(1)的
+#   标题索引：按照标题的UTF-8字节排序的文章下标（8字节），按标题查找是O(log n)的
+# 两个索引都是8字节对齐的，可以直接把mmap的memoryview转换成整数数组，不需要复制
+
+MAGIC = b"ARTARCH\0"
+VERSION = 1
+BYTE_ORDER_MARK = 0x01020304
+HEADER = struct.Struct("=8sIIQQQQ")
+LENGTH = struct.Struct("=I")
+
+
+def write_archive(path: str | os.PathLike[str], articles: Iterable[Article]):
+    offsets = array("Q")
+    titles: list[bytes] = []
+    tmp = f"{os.fspath(path)}.tmp"
+    with open(tmp, "wb") as file:
+        file.write(b"\0" * HEADER.size)
+        position = 0
+        for article in articles:
+            title = article.title.encode()
+            summary = article.summary.encode()
+            offsets.append(position)
+            titles.append(title)
+            record = b"".join(
+                (LENGTH.pack(len(title)), title, LENGTH.pack(len(summary)), summary)
+            )
+            file.write(record)
+            position += len(record)
+
+        # 排序是稳定的，重复的标题按照写入的顺序排列，查找时返回第一个
+        order = array("Q", sorted(range(len(titles)), key=titles.__getitem__))
+        padding = -(HEADER.size + position) % 8
+        file.write(b"\0" * padding)
+        offsets_at = HEADER.size + position + padding
+        sorted_at = offsets_at + offsets.itemsize * len(offsets)
+        file.write(offsets.tobytes())
+        file.write(order.tobytes())
+
+        file.seek(0)
+        file.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                BYTE_ORDER_MARK,
+                len(offsets),
+                HEADER.size,
+                offsets_at,
+                sorted_at,
+            )
+        )
+    # 写完之后再替换，已经打开旧文件的进程不受影响
+    os.replace(tmp, path)
+
+
+class ArticleArchive(Sequence[Article]):
+    def __init__(self, path: str | os.PathLike[str]):
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        # 访问的模式是随机的，不需要操作系统预读
+        if hasattr(self._mmap, "madvise") and hasattr(mmap, "MADV_RANDOM"):
+            self._mmap.madvise(mmap.MADV_RANDOM)
+        self._view = memoryview(self._mmap)
+        try:
+            self._open(path)
+        except BaseException:
+            self.close()
+            raise
+
+    # 打开的时候检查文件头中的各个区域都在文件之内，截断的文件不会等到访问的时候才出错
+    def _open(self, path: str | os.PathLike[str]):
+        if len(self._view) < HEADER.size:
+            raise ValueError(f"{path} is not an article archive")
+        magic, version, mark, count, strings_at, offsets_at, sorted_at = (
+            HEADER.unpack_from(self._view)
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not an article archive")
+        if mark != BYTE_ORDER_MARK:
+            raise ValueError(f"{path} was written with a different byte order")
+        if not (
+            HEADER.size <= strings_at <= offsets_at
+            and offsets_at % 8 == 0
+            and sorted_at == offsets_at + 8 * count
+            and sorted_at + 8 * count <= len(self._view)
+        ):
+            raise ValueError(f"{path} is truncated or corrupt")
+        self._count = count
+        self._strings = self._view[strings_at:offsets_at]
+        self._offsets = self._view[offsets_at:sorted_at].cast("Q")
+        self._sorted = self._view[sorted_at : sorted_at + 8 * count].cast("Q")
+
+    # 如果调用方还持有title_bytes等返回的memoryview，关闭时会抛出BufferError
+    def close(self):
+        for name in ("_sorted", "_offsets", "_strings", "_view"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _check(self, index: int) -> int:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("ArticleArchive index out of range")
+        return index
+
+    def _fields(self, index: int) -> tuple[memoryview, memoryview]:
+        position = self._offsets[self._check(index)]
+        (size,) = LENGTH.unpack_from(self._strings, position)
+        position += LENGTH.size
+        title = self._strings[position : position + size]
+        position += size
+        (size,) = LENGTH.unpack_from(self._strings, position)
+        position += LENGTH.size
+        return title, self._strings[position : position + size]
+
+    # 直接返回mmap中的UTF-8字节，不复制也不解码
+    def title_bytes(self, index: int) -> memoryview:
+        return self._fields(index)[0]
+
+    def summary_bytes(self, index: int) -> memoryview:
+        return self._fields(index)[1]
+
+    @overload
+    def __getitem__(self, index: int) -> Article: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Article]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        title, summary = self._fields(index)
+        return Article(str(title, "utf-8"), str(summary, "utf-8"))
+
+    def __iter__(self) -> Iterator[Article]:
+        for index in range(self._count):
+            yield self[index]
+
+    # 在标题索引中二分查找，每次比较只复制一个标题
+    def find(self, title: str) -> Optional[int]:
+        key = title.encode()
+        i = bisect.bisect_left(
+            self._sorted, key, key=lambda index: self.title_bytes(index).tobytes()
+        )
+        if i < self._count and self.title_bytes(self._sorted[i]) == key:
+            return self._sorted[i]
+        return None
+
+    def get(self, title: str) -> Optional[Article]:
+        index = self.find(title)
+        return None if index is None else self[index]
@@ -0,0 +1,62 @@
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from typing import overload
+
+from ch6.random_wikipedia_article import Article
+
+
+# 普通的dataclass每个实例都有一个__dict__，使用slots=True可以省掉它
+@dataclass(slots=True)
+class SlottedArticle:
+    title: str = ""
+    summary: str = ""
+
+
+# 按列存储大量文章：所有的标题和摘要依次编码为UTF-8放在同一个bytearray中，
+# offsets记录每个字符串的起止位置，第i篇文章的标题是buffer[offsets[2i]:offsets[2i+1]]，
+# 摘要是buffer[offsets[2i+1]:offsets[2i+2]]。只有在访问的时候才会创建Article对象
+class ArticleBatch(Sequence[Article]):
+    def __init__(self, articles: Iterable[Article] = ()):
+        self._buffer = bytearray()
+        self._offsets = array("Q", [0])
+        self.extend(articles)
+
+    def append(self, article: Article):
+        for text in (article.title, article.summary):
+            self._buffer += text.encode()
+            self._offsets.append(len(self._buffer))
+
+    def extend(self, articles: Iterable[Article]):
+        for article in articles:
+            self.append(article)
+
+    def __len__(self) -> int:
+        return len(self._offsets) // 2
+
+    def _text(self, index: int) -> str:
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return self._buffer[start:end].decode()
+
+    @overload
+    def __getitem__(self, index: int) -> Article: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "ArticleBatch": ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ArticleBatch(self[i] for i in range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ArticleBatch index out of range")
+        return Article(self._text(2 * index), self._text(2 * index + 1))
+
+    def __iter__(self) -> Iterator[Article]:
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._buffer) + self._offsets.itemsize * len(self._offsets)
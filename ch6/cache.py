@@ -0,0 +1,295 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+from urllib import request
+from urllib.error import HTTPError
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+
+from ch6.retry import RetryPolicy, send
+
+if TYPE_CHECKING:
+    from ch6.ratelimit import TokenBucket
+
+# 随机文章的接口会重定向到每个标题固定的summary地址，所以缓存的是重定向之后的响应
+# 随机文章的地址本身永远不缓存，即使它直接返回了文章（如测试用的替身服务器），否则每次都会得到同一篇文章
+# 缓存存放在SQLite中，按照URL和会影响响应内容的请求头作为key，
+# 有效时间来自Cache-Control的max-age（no-cache表示每次都要重新验证，no-store表示不缓存），没有的时候使用ttl，
+# 过期之后使用ETag/Last-Modified进行条件请求，总大小超过上限的时候按照LRU淘汰
+#
+# 缓存是为了降低延迟，所以要避免每次访问都等待fsync：
+# 1. 和ch6/store.py一样使用WAL和synchronous=NORMAL
+# 2. 访问时间只精确到ACCESS_RESOLUTION秒，在这之内再次命中不需要写入
+# 3. 记录写入的总大小的估计值，只有超过上限的时候才计算实际的大小并淘汰
+
+VARY_HEADERS = ("accept", "accept-language")
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 20
+ACCESS_RESOLUTION = 60.0
+# 表结构变化的时候修改这个值，旧的缓存会被清空
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    body BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    max_age REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+# 用窗口函数按照最近访问时间累加大小，超出上限的那些最久未访问的记录会被删除
+EVICT = """
+DELETE FROM responses WHERE key IN (
+    SELECT key FROM (
+        SELECT key, SUM(LENGTH(body)) OVER (ORDER BY accessed_at DESC) AS total
+        FROM responses
+    ) WHERE total > ?
+)
+"""
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+    max_age: float
+
+
+def is_random(url) -> bool:
+    return "random" in urlsplit(str(url)).path.split("/")
+
+
+# 根据Cache-Control计算响应的有效时间，返回None表示不能缓存
+def freshness(headers: Mapping[str, str], default: float) -> Optional[float]:
+    directives = {}
+    for directive in (headers.get("Cache-Control") or "").split(","):
+        name, _, value = directive.strip().partition("=")
+        directives[name.lower()] = value.strip('"')
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    if "max-age" in directives:
+        try:
+            return max(0.0, float(directives["max-age"]))
+        except ValueError:
+            return 0.0
+    return default
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 3600.0,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            with self._db:
+                self._db.execute("DROP TABLE IF EXISTS responses")
+                self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._db.executescript(SCHEMA)
+        # 其他进程写入的内容不会计入，所以只是估计值，超过上限的时候会重新计算
+        self._size = self._total()
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def key(url: str, headers: Mapping[str, str]) -> str:
+        headers = {name.lower(): value for name, value in headers.items()}
+        parts = [str(url)]
+        parts += [f"{name}: {headers.get(name, '')}" for name in VARY_HEADERS]
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def _total(self) -> int:
+        return self._db.execute(
+            "SELECT COALESCE(SUM(LENGTH(body)), 0) FROM responses"
+        ).fetchone()[0]
+
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, stored_at, max_age, accessed_at"
+                " FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            # 访问时间是LRU的依据，但是不需要每次命中都写入
+            now = time.time()
+            if now - row[-1] >= ACCESS_RESOLUTION:
+                with self._db:
+                    self._db.execute(
+                        "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                        (now, key),
+                    )
+        return CacheEntry(*row[:-1])
+
+    @staticmethod
+    def is_fresh(entry: CacheEntry) -> bool:
+        return time.time() - entry.stored_at < entry.max_age
+
+    @staticmethod
+    def validators(entry: Optional[CacheEntry]) -> dict[str, str]:
+        headers = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def store(self, key: str, url: str, body: bytes, headers: Mapping[str, str]):
+        self.misses += 1
+        max_age = freshness(headers, self.ttl)
+        if max_age is None or is_random(url):
+            return
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    str(url),
+                    headers.get("ETag"),
+                    headers.get("Last-Modified"),
+                    body,
+                    now,
+                    max_age,
+                    now,
+                ),
+            )
+            # 替换的记录的大小没有减去，估计值只会偏大
+            self._size += len(body)
+            if self._size > self.max_bytes:
+                self._size = self._total()
+                if self._size > self.max_bytes:
+                    self._db.execute(EVICT, (self.max_bytes,))
+                    self._size = self._total()
+
+    def refresh(self, key: str, headers: Optional[Mapping[str, str]] = None):
+        # 服务器返回304，说明缓存的内容仍然有效，重新开始计算有效时间
+        self.revalidations += 1
+        max_age = freshness(headers or {}, self.ttl)
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE responses SET stored_at = ?, max_age = ? WHERE key = ?",
+                (time.time(), max_age or 0.0, key),
+            )
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM responses"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+# 手动处理重定向，这样重定向之后的每个地址都可以先查缓存
+# 没有命中缓存的时候和fetch一样通过send发出请求，按照retry重试，每次请求之前从limiter拿到令牌，
+# 缓存命中不消耗令牌
+def get_cached(
+    client: httpx.Client,
+    url,
+    cache: ResponseCache,
+    retry: Optional[RetryPolicy] = None,
+    limiter: Optional["TokenBucket"] = None,
+) -> bytes:
+    retry = retry or RetryPolicy()
+    for _ in range(MAX_REDIRECTS):
+        key = cache.key(url, client.headers)
+        entry = None if is_random(url) else cache.lookup(key)
+        if entry is not None and cache.is_fresh(entry):
+            cache.hits += 1
+            return entry.body
+
+        response = send(
+            client,
+            url,
+            retry,
+            limiter,
+            headers=cache.validators(entry),
+            follow_redirects=False,
+        )
+        if response.status_code == 304 and entry is not None:
+            cache.refresh(key, response.headers)
+            return entry.body
+        if response.is_redirect:
+            url = response.url.join(response.headers["Location"])
+            continue
+
+        response.raise_for_status()
+        cache.store(key, url, response.content, response.headers)
+        return response.content
+
+    raise httpx.TooManyRedirects("Exceeded maximum allowed redirects.")
+
+
+class _NoRedirectHandler(request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_opener = request.build_opener(_NoRedirectHandler)
+
+
+# 和get_cached一样，但是用于urllib
+def urlopen_cached(req: request.Request, cache: ResponseCache) -> bytes:
+    url = req.full_url
+    headers = dict(req.header_items())
+    for _ in range(MAX_REDIRECTS):
+        key = cache.key(url, headers)
+        entry = None if is_random(url) else cache.lookup(key)
+        if entry is not None and cache.is_fresh(entry):
+            cache.hits += 1
+            return entry.body
+
+        hop = request.Request(url, headers={**headers, **cache.validators(entry)})
+        try:
+            with _opener.open(hop) as response:
+                body = response.read()
+                cache.store(key, url, body, response.headers)
+                return body
+        except HTTPError as error:
+            if error.code == 304 and entry is not None:
+                cache.refresh(key, error.headers)
+                return entry.body
+            if error.code not in REDIRECT_CODES:
+                raise
+            url = urljoin(url, error.headers["Location"])
+
+    raise HTTPError(url, 310, "Exceeded maximum allowed redirects.", None, None)
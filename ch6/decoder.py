@@ -0,0 +1,54 @@
+import json
+from collections.abc import Callable
+from typing import Any, Optional
+
+# orjson和msgspec都是可选依赖，它们解析JSON比标准库快很多，而且可以直接从bytes解析
+# 没有安装的时候退回到标准库的json，json.loads也可以直接接受bytes
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+try:
+    import msgspec
+except ModuleNotFoundError:
+    msgspec = None
+
+DECODERS: dict[str, Callable[[bytes], Any]] = {"json": json.loads}
+if orjson is not None:
+    DECODERS["orjson"] = orjson.loads
+if msgspec is not None:
+    DECODERS["msgspec"] = msgspec.json.decode
+
+# 按照优先级选择已安装的后端
+DEFAULT_BACKEND = next(
+    name for name in ("orjson", "msgspec", "json") if name in DECODERS
+)
+
+
+def get_decoder(backend: Optional[str] = None) -> Callable[[bytes], Any]:
+    return DECODERS[backend or DEFAULT_BACKEND]
+
+
+loads = get_decoder()
+
+
+# 如果安装了msgspec，可以定义一个和Article对应的Struct，解析的时候会同时进行类型检查，不需要生成中间的dict
+# decode_summary返回(title, summary)，这样这个模块不需要依赖Article
+if msgspec is not None:
+
+    class ArticleStruct(msgspec.Struct):
+        title: str
+        summary: str = msgspec.field(name="extract")
+
+    _summary_decoder = msgspec.json.Decoder(ArticleStruct)
+
+    def decode_summary(data: bytes) -> tuple[str, str]:
+        article = _summary_decoder.decode(data)
+        return article.title, article.summary
+
+else:
+
+    def decode_summary(data: bytes) -> tuple[str, str]:
+        fields = loads(data)
+        return fields["title"], fields["extract"]
@@ -0,0 +1,165 @@
+import gc
+import io
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import IO, TYPE_CHECKING, Optional
+
+from ch6.random_wikipedia_article import create_client, parse, show
+from ch6.retry import RetryPolicy, send
+
+if TYPE_CHECKING:
+    import httpx
+
+# 使用tracemalloc检查fetch -> parse -> show每个阶段的内存分配，用来判断内存的增长来自httpx的缓冲区，
+# Article对象还是Rich的渲染缓存
+# 1. 每篇文章的每个阶段都记录当前内存的变化和峰值，峰值是处理一篇文章时临时需要的内存
+# 2. 预热之后和结束时各拍一次快照，两者的差就是没有被释放的内存，按照分配的位置列出最多的那些
+# 3. 最后一篇文章的每个阶段结束时拍快照，可以看到每个阶段分别在哪里分配了内存
+#
+# python -m ch6.random_wikipedia_article --count 100 --memory
+
+# 和请求无关的分配，比如导入模块，tracemalloc和这个模块自己
+# 注意同一个进程中的其他线程（比如测试用的替身服务器）的分配也会被记录
+_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+STAGES = ("request", "parse", "show")
+
+
+@dataclass
+class StageStats:
+    # 处理一篇文章时，超过阶段开始时的内存的最大值
+    peak: int = 0
+    # 所有文章在这个阶段的内存变化的总和
+    net: int = 0
+    top: list[tracemalloc.StatisticDiff] = field(default_factory=list)
+
+
+@dataclass
+class MemoryReport:
+    articles: int
+    stages: dict[str, StageStats]
+    leaked: int
+    top: list[tracemalloc.StatisticDiff]
+
+    # 处理一篇文章的过程中最多需要的内存
+    @property
+    def peak_per_article(self) -> int:
+        return max((stage.peak for stage in self.stages.values()), default=0)
+
+    @property
+    def leaked_per_article(self) -> float:
+        return self.leaked / self.articles if self.articles else 0.0
+
+    def format(self, limit: int = 5) -> str:
+        lines = [f"{'stage':8} {'peak':>10} {'net/article':>12} (bytes)"]
+        for name, stage in self.stages.items():
+            net = stage.net / self.articles if self.articles else 0
+            lines.append(f"{name:8} {stage.peak:10d} {net:12.0f}")
+        lines.append(
+            f"{self.articles} articles: peak {self.peak_per_article} bytes,"
+            f" not freed {self.leaked_per_article:.0f} bytes per article"
+        )
+        for name, stage in self.stages.items():
+            lines.append(f"top allocations in {name}:")
+            lines += [f"  {stat}" for stat in stage.top[:limit]]
+        lines.append("top allocations not freed:")
+        lines += [f"  {stat}" for stat in self.top[:limit]]
+        return "\n".join(lines) + "\n"
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+
+def _diff(
+    after: tracemalloc.Snapshot, before: tracemalloc.Snapshot, limit: int
+) -> list[tracemalloc.StatisticDiff]:
+    stats = after.compare_to(before, "lineno")
+    return [stat for stat in stats if stat.size_diff > 0][:limit]
+
+
+def measure(
+    url,
+    n: int,
+    client: Optional["httpx.Client"] = None,
+    file: Optional[IO[str]] = None,
+    warmup: int = 3,
+    frames: int = 10,
+    limit: int = 10,
+) -> MemoryReport:
+    if client is None:
+        with create_client() as client:
+            return measure(url, n, client, file, warmup, frames, limit)
+    file = file or io.StringIO()
+
+    stages = {name: StageStats() for name in STAGES}
+    policy = RetryPolicy(attempts=1)
+    steps = {
+        "request": lambda _: send(client, url, policy),
+        "parse": parse,
+        "show": lambda article: show(article, file),
+    }
+
+    # 已经在跟踪的时候（比如调用方自己开启了tracemalloc）不要停止它
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start(frames)
+    try:
+        # 预热：建立连接，填充各种缓存
+        for _ in range(warmup):
+            value = None
+            for step in steps.values():
+                value = step(value)
+        value = None
+        gc.collect()
+        start = _snapshot()
+
+        for i in range(n):
+            value = None
+            last = i == n - 1
+            before_stage = _snapshot() if last else None
+            for name, step in steps.items():
+                stage = stages[name]
+                before, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                value = step(value)
+                current, peak = tracemalloc.get_traced_memory()
+                stage.peak = max(stage.peak, peak - before)
+                stage.net += current - before
+                if last:
+                    # 最后一篇文章开始之前已经拍了快照
+                    assert before_stage is not None
+                    after_stage = _snapshot()
+                    stage.top = _diff(after_stage, before_stage, limit)
+                    before_stage = after_stage
+            value = None
+
+        gc.collect()
+        end = _snapshot()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    leaked = sum(stat.size_diff for stat in end.compare_to(start, "filename"))
+    return MemoryReport(n, stages, max(0, leaked), _diff(end, start, limit))
+
+
+# 在测试中使用，超过预算的时候失败并给出报告
+def check_budget(
+    report: MemoryReport, peak: Optional[int] = None, leaked: Optional[int] = None
+):
+    problems = []
+    if peak is not None and report.peak_per_article > peak:
+        problems.append(f"peak {report.peak_per_article} > {peak} bytes per article")
+    if leaked is not None and report.leaked_per_article > leaked:
+        problems.append(
+            f"not freed {report.leaked_per_article:.0f} > {leaked} bytes per article"
+        )
+    if problems:
+        raise AssertionError("; ".join(problems) + "\n" + report.format())
@@ -0,0 +1,144 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+from collections import Counter, defaultdict
+from collections.abc import Callable
+from types import CodeType, FrameType
+from typing import IO, Optional
+
+# 命令行的--profile模式，不需要手动包装模块就可以看到时间花在了httpx，Rich还是JSON解码上
+# 1. cprofile：使用cProfile记录每个函数的调用，结果保存为pstats文件，可以用snakeviz等工具查看
+# 2. sample：在后台线程中定期采样主线程的调用栈，开销很小，对程序的运行时间影响不大
+# 两种模式都会输出火焰图工具（flamegraph.pl，speedscope等）可以读取的折叠栈文件，并打印最耗时的函数
+#
+# 可以使用本地的替身服务器，这样结果不受网络的影响，可以重复：
+# python -m ch6.standin --port 8000
+# python -m ch6.random_wikipedia_article --url http://localhost:8000/page/random/summary \
+#     --count 200 --profile sample
+
+TOP = 15
+# 从cProfile的调用图还原调用栈时，忽略小于这个时间（秒）的路径，否则路径的数量会非常多
+MIN_WEIGHT = 1e-5
+MAX_DEPTH = 64
+
+
+def _label(filename: str, lineno: int, name: str) -> str:
+    if filename == "~":
+        return name
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+class Sampler:
+    def __init__(self, interval: float = 0.001, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples: Counter[tuple[str, ...]] = Counter()
+        self._labels: dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[self._stack(frame)] += 1
+
+    def _stack(self, frame: Optional[FrameType]) -> tuple[str, ...]:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = _label(
+                    code.co_filename, code.co_firstlineno, code.co_qualname
+                )
+            stack.append(label)
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+    def collapsed(self) -> Counter[str]:
+        return Counter({";".join(s): n for s, n in self.samples.items()})
+
+    def top(self, n: int = TOP) -> list[tuple[str, int, int]]:
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self.samples.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                total[label] += count
+        return [(label, count, total[label]) for label, count in own.most_common(n)]
+
+
+# cProfile只记录调用者和被调用者之间的关系，不记录完整的调用栈
+# 这里按照每个调用者占的比例，把函数自身的时间分配到从根到它的各条路径上
+def collapse(stats: pstats.Stats) -> Counter[str]:
+    entries = stats.stats  # type: ignore[attr-defined]
+    labels = {func: _label(*func) for func in entries}
+    # 以秒为单位累加，最后再转换成整数的微秒
+    stacks: defaultdict[str, float] = defaultdict(float)
+
+    def walk(func, path: list[str], weight: float, seen: frozenset):
+        callers = entries[func][4]
+        # 根
+        if not callers or len(path) >= MAX_DEPTH:
+            stacks[";".join(reversed(path))] += weight
+            return
+        total = sum(edge[3] for edge in callers.values())
+        for caller, edge in callers.items():
+            share = weight * (edge[3] / total if total else 1 / len(callers))
+            # 太小的路径和递归一样在这里截断，这样总的时间不会丢失
+            if share < MIN_WEIGHT or caller in seen or caller not in entries:
+                stacks[";".join(reversed(path))] += share
+            else:
+                walk(caller, [*path, labels[caller]], share, seen | {caller})
+
+    for func, (_, _, tottime, _, _) in entries.items():
+        if tottime >= MIN_WEIGHT:
+            walk(func, [labels[func]], tottime, frozenset({func}))
+    # 以微秒为单位，flamegraph要求是整数
+    return Counter({s: round(w * 1e6) for s, w in stacks.items() if w * 1e6 >= 1})
+
+
+def write_collapsed(stacks: Counter[str], path: str):
+    with open(path, "w") as file:
+        for stack, weight in sorted(stacks.items()):
+            file.write(f"{stack} {weight}\n")
+
+
+def profile(
+    fn: Callable[[], object],
+    mode: str = "cprofile",
+    output: str = "profile",
+    file: Optional[IO[str]] = None,
+    interval: float = 0.001,
+):
+    file = file or sys.stderr
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.runcall(fn)
+        stats = pstats.Stats(profiler, stream=file)
+        stats.dump_stats(f"{output}.pstats")
+        write_collapsed(collapse(stats), f"{output}.collapsed")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(TOP)
+        file.write(f"wrote {output}.pstats and {output}.collapsed\n")
+    elif mode == "sample":
+        with Sampler(interval) as sampler:
+            fn()
+        write_collapsed(sampler.collapsed(), f"{output}.collapsed")
+        samples = sum(sampler.samples.values()) or 1
+        file.write(f"{'self':>7} {'total':>7}  function ({samples} samples)\n")
+        for label, own, total in sampler.top():
+            file.write(f"{own / samples:7.1%} {total / samples:7.1%}  {label}\n")
+        file.write(f"wrote {output}.collapsed\n")
+    else:
+        raise ValueError(f"unknown profile mode: {mode!r}")
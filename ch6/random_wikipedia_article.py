@@ -1,16 +1,32 @@
 import sys
-import textwrap
-from dataclasses import dataclass
-from typing import Optional, IO
+from collections.abc import AsyncIterator, Iterable, Sequence
+from dataclasses import asdict, dataclass
+from typing import IO, TYPE_CHECKING, Optional
 from warnings import deprecated
 
-import httpx
-from rich.console import Console
+from ch6.render import get_renderer
+
+# 作为命令行工具，每次运行的时候解释器的启动和模块的导入占了大部分时间
+# 所以httpx（连带h2等HTTP/2相关的模块），asyncio，JSON解码器等都在用到的时候才导入，
+# 类型标注中用到的只在类型检查的时候导入
+# 可以使用python -X importtime -c "import ch6.random_wikipedia_article"查看导入的耗时
+if TYPE_CHECKING:
+    import httpx
+
+    from ch6.cache import ResponseCache
+    from ch6.ratelimit import TokenBucket
+    from ch6.retry import RetryPolicy
+    from ch6.stats import FetchStats
+    from ch6.store import ArticleStore
 
 API_URL = "https://en.wikipedia.org/api/rest_v1/page/random/summary"
 
 USER_AGENT = "RandomWiki/1.0 (Contact: zjjblue@gmail.com)"
 
+# 明确设置超时时间，而不是依赖httpx的默认值，超时之后会按照重试策略重试
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 10.0
+
 
 @dataclass
 class Article:
@@ -18,33 +34,331 @@ class Article:
     summary: str = ""
 
 
-def fetch(url):
+# 每次新建httpx.Client都要重新建立TCP连接，进行TLS握手和HTTP/2的协商
+# 循环调用fetch的时候，应该创建一个长期存在的client并传给fetch，这样可以复用连接池里的连接
+def create_client(
+    *,
+    max_connections: int = 10,
+    max_keepalive_connections: int = 10,
+    keepalive_expiry: float = 60.0,
+    connect_timeout: float = CONNECT_TIMEOUT,
+    read_timeout: float = READ_TIMEOUT,
+    stats: Optional["FetchStats"] = None,
+) -> "httpx.Client":
+    import httpx
+
+    headers = {"User-Agent": USER_AGENT}
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+    event_hooks = {"request": [stats.on_request]} if stats else {}
+    return httpx.Client(
+        headers=headers,
+        http2=True,
+        limits=limits,
+        timeout=timeout,
+        event_hooks=event_hooks,
+    )
+
+
+def create_async_client(
+    *,
+    max_connections: int = 10,
+    max_keepalive_connections: int = 10,
+    keepalive_expiry: float = 60.0,
+    connect_timeout: float = CONNECT_TIMEOUT,
+    read_timeout: float = READ_TIMEOUT,
+    stats: Optional["FetchStats"] = None,
+) -> "httpx.AsyncClient":
+    import httpx
+
     headers = {"User-Agent": USER_AGENT}
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+    event_hooks = {"request": [stats.on_request_async]} if stats else {}
+    return httpx.AsyncClient(
+        headers=headers,
+        http2=True,
+        limits=limits,
+        timeout=timeout,
+        event_hooks=event_hooks,
+    )
+
+
+def parse(response: "httpx.Response") -> Article:
+    from ch6.decoder import decode_summary
+
+    response.raise_for_status()
+    # client开启了统计的时候，请求中会带有FetchStats
+    stats = response.request.extensions.get("stats")
+    if stats is None:
+        return Article(*decode_summary(response.content))
+
+    from time import perf_counter
+
+    start = perf_counter()
+    fields = decode_summary(response.content)
+    decoded = perf_counter()
+    article = Article(*fields)
+    stats.record("decode", decoded - start)
+    stats.record("construct", perf_counter() - decoded)
+    return article
+
+
+def fetch(
+    url,
+    client: Optional["httpx.Client"] = None,
+    cache: Optional["ResponseCache"] = None,
+    retry: Optional["RetryPolicy"] = None,
+    limiter: Optional["TokenBucket"] = None,
+):
+    # 没有传入client的时候，使用一个一次性的client
+    if client is None:
+        with create_client() as client:
+            return fetch(url, client, cache, retry, limiter)
+
+    if cache is not None:
+        from ch6.cache import get_cached
+        from ch6.decoder import decode_summary
+
+        body = get_cached(client, url, cache, retry, limiter)
+        return Article(*decode_summary(body))
+
+    from ch6.retry import RetryPolicy, send
+
+    # 每次调用使用新的默认策略，策略中记录的延迟不会在调用方之间共享
+    response = send(client, url, retry or RetryPolicy(), limiter)
+    return parse(response)
+
+
+async def fetch_async(
+    url,
+    client: "httpx.AsyncClient",
+    retry: Optional["RetryPolicy"] = None,
+    limiter: Optional["TokenBucket"] = None,
+) -> Article:
+    from ch6.retry import RetryPolicy, send_async
+
+    response = await send_async(client, url, retry or RetryPolicy(), limiter)
+    return parse(response)
+
 
-    with httpx.Client(headers=headers, http2=True) as client:
-        response = client.get(url, follow_redirects=True)
-        response.raise_for_status()
-        data = response.json()
+# 并发地获取n篇文章，同时在途的请求不超过concurrency个，按照完成的顺序返回结果
+# 使用HTTP/2的时候，这些请求会复用同一个连接的多个stream
+async def fetch_many(
+    url,
+    n: int,
+    concurrency: int = 10,
+    client: Optional["httpx.AsyncClient"] = None,
+    retry: Optional["RetryPolicy"] = None,
+    limiter: Optional["TokenBucket"] = None,
+    stats: Optional["FetchStats"] = None,
+) -> AsyncIterator[Article]:
+    import asyncio
 
-    return Article(data["title"], data["extract"])
+    # stats只在这里创建client的时候使用，传入的client需要自己开启统计
+    if client is None:
+        async with create_async_client(
+            max_connections=concurrency, stats=stats
+        ) as client:
+            async for article in fetch_many(
+                url, n, concurrency, client, retry, limiter
+            ):
+                yield article
+        return
+
+    pending: set[asyncio.Task[Article]] = set()
+    remaining = n
+    try:
+        while remaining or pending:
+            # 只在有空位的时候才创建新任务，这样内存占用和n无关
+            while remaining and len(pending) < concurrency:
+                pending.add(
+                    asyncio.create_task(fetch_async(url, client, retry, limiter))
+                )
+                remaining -= 1
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                yield task.result()
+    finally:
+        # 调用方提前退出迭代或者出错的时候，取消还没完成的请求
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
 
 
 @deprecated("use show() instead")
 def show2(article: Article, file: Optional[IO[str]]):
+    import textwrap
+
     summary = textwrap.fill(article.summary)
     file.write(f"{article.title}\n\n{summary}\n")
 
 
+# 输出到文件或者管道的时候使用不经过Rich的renderer，输出到终端的时候每个输出流复用同一个Console
 def show(article: Article, file: Optional[IO[str]]):
-    console = Console(file=file, width=72, highlight=False)
-    console.print(article.title, style="bold")
-    if article.summary:
-        console.print(f"\n{article.summary}")
+    get_renderer(file or sys.stdout).show(article)
+
+
+# 把所有文章渲染完之后一次性写入
+def show_many(articles: Iterable[Article], file: Optional[IO[str]]):
+    file = file or sys.stdout
+    renderer = get_renderer(file)
+    file.write("".join(renderer.render(article) for article in articles))
+
+
+# 以JSON Lines格式输出文章，每篇文章到达之后立即写出并flush，方便在管道中使用
+async def write_jsonl(
+    url,
+    n: int,
+    file: IO[str],
+    concurrency: int = 10,
+    retry: Optional["RetryPolicy"] = None,
+    limiter: Optional["TokenBucket"] = None,
+    stats: Optional["FetchStats"] = None,
+    store: Optional["ArticleStore"] = None,
+):
+    import json
+
+    async for article in fetch_many(
+        url, n, concurrency, retry=retry, limiter=limiter, stats=stats
+    ):
+        if store is not None:
+            store.add(article)
+        file.write(json.dumps(asdict(article), ensure_ascii=False) + "\n")
+        file.flush()
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="random-wikipedia-article")
+    parser.add_argument("--url", default=API_URL, help="API endpoint")
+    parser.add_argument("--count", type=int, default=1, help="number of articles")
+    parser.add_argument(
+        "--jsonl", action="store_true", help="write articles as JSON Lines"
+    )
+    parser.add_argument(
+        "--retries", type=int, default=2, help="retries on 429/5xx and timeouts"
+    )
+    parser.add_argument(
+        "--hedge", action="store_true", help="send a second request if one is slow"
+    )
+    parser.add_argument("--rate", type=float, help="maximum requests per second")
+    parser.add_argument(
+        "--rate-file", help="share the rate limit with other processes via this file"
+    )
+    parser.add_argument(
+        "--stats", action="store_true", help="print per-phase latencies to stderr"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=("cprofile", "sample"),
+        help="profile the run and print the hottest functions to stderr",
+    )
+    parser.add_argument(
+        "--profile-output",
+        default="random-wikipedia-article",
+        metavar="PREFIX",
+        help="write PREFIX.pstats (cprofile) and PREFIX.collapsed",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="trace allocations per stage and print a report to stderr",
+    )
+    parser.add_argument("--store", metavar="PATH", help="save articles to a database")
+    parser.add_argument(
+        "--search", metavar="QUERY", help="search the --store database, no fetching"
+    )
+    parser.add_argument(
+        "--limit", type=int, default=20, help="maximum number of --search results"
+    )
+    args = parser.parse_args(argv)
+
+    from ch6.ratelimit import create_limiter
+    from ch6.retry import RetryPolicy
+
+    retry = RetryPolicy(attempts=args.retries + 1, hedge=args.hedge)
+    limiter = create_limiter(args.rate, path=args.rate_file)
+    stats = None
+    if args.stats:
+        from ch6.stats import FetchStats
+
+        stats = FetchStats()
+
+    store = None
+    if args.store:
+        from ch6.store import ArticleStore
+
+        store = ArticleStore(args.store)
+    elif args.search:
+        parser.error("--search requires --store")
+
+    def run():
+        if args.search:
+            assert store is not None
+            show_many(store.search(args.search, limit=args.limit), sys.stdout)
+            return
+
+        if args.memory:
+            from ch6.memory import measure
+
+            with create_client(stats=stats) as client:
+                report = measure(args.url, args.count, client, sys.stdout)
+            sys.stderr.write(report.format())
+            return
+
+        if args.jsonl:
+            import asyncio
+
+            asyncio.run(
+                write_jsonl(
+                    args.url,
+                    args.count,
+                    sys.stdout,
+                    retry=retry,
+                    limiter=limiter,
+                    stats=stats,
+                    store=store,
+                )
+            )
+            return
+
+        from time import perf_counter
+
+        with create_client(stats=stats) as client:
+            for _ in range(args.count):
+                article = fetch(args.url, client, retry=retry, limiter=limiter)
+                if store is not None:
+                    store.add(article)
+                start = perf_counter()
+                show(article, sys.stdout)
+                if stats is not None:
+                    stats.record("render", perf_counter() - start)
+
+    try:
+        if args.profile:
+            from ch6.profiling import profile
 
+            profile(run, args.profile, args.profile_output)
+        else:
+            run()
+    finally:
+        if store is not None:
+            store.close()
 
-def main():
-    article = fetch(API_URL)
-    show(article, sys.stdout)
+    if stats is not None:
+        sys.stderr.write(stats.report())
 
 
 if __name__ == "__main__":
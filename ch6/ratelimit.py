@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+# 令牌桶限速：令牌按照rate（每秒）的速度产生，最多积攒capacity个，每个请求消耗一个
+# capacity决定了允许的突发请求数，默认为1，也就是请求严格按照固定的间隔发出，不会有突发
+#
+# 获取令牌的时候不排队等待，而是直接“预订”：令牌数可以是负数，表示已经被预订的未来的令牌，
+# 调用方只需要睡眠到属于自己的那个令牌产生的时候，所以同一个限速器可以同时用于线程和asyncio任务
+#
+# SharedTokenBucket把状态保存在SQLite中，多个进程使用同一个文件就会共享同一个速率限制
+
+
+def _take(
+    tokens: float, updated: float, now: float, rate: float, capacity: float
+) -> tuple[float, float]:
+    tokens = min(capacity, tokens + (now - updated) * rate) - 1
+    return tokens, max(0.0, -tokens / rate)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    # 预订一个令牌，返回需要等待的时间
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens, delay = _take(
+                self._tokens, self._updated, now, self.rate, self.capacity
+            )
+            self._updated = now
+        return delay
+
+    def acquire(self):
+        if delay := self.reserve():
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        if delay := self.reserve():
+            import asyncio
+
+            await asyncio.sleep(delay)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+)
+"""
+
+
+# 不同进程的monotonic时钟没有可比性，所以这里使用time.time()
+class SharedTokenBucket(TokenBucket):
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        rate: float,
+        capacity: float = 1.0,
+        name: str = "default",
+    ):
+        super().__init__(rate, capacity)
+        self.name = name
+        # 自己管理事务，使用BEGIN IMMEDIATE在读取之前就拿到写锁，这样多个进程的读-改-写不会交错
+        self._db = sqlite3.connect(
+            path, timeout=30.0, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def reserve(self) -> float:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._db.execute(
+                    "SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                tokens, updated = row or (self.capacity, now)
+                tokens, delay = _take(tokens, updated, now, self.rate, self.capacity)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)",
+                    (self.name, tokens, now),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return delay
+
+
+def create_limiter(
+    rate: Optional[float], capacity: float = 1.0, path: Optional[str] = None
+) -> Optional[TokenBucket]:
+    if rate is None:
+        return None
+    if path is None:
+        return TokenBucket(rate, capacity)
+    return SharedTokenBucket(path, rate, capacity)
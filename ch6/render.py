@@ -0,0 +1,128 @@
+import io
+import os
+import re
+from typing import IO, TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from ch6.random_wikipedia_article import Article
+
+WIDTH = 72
+
+# Rich会按照下面的规则把文本分成“单词”：单词前后的空白都属于这个单词
+_WORD = re.compile(r"\s*\S+\s*")
+# 包含这些内容的文本会被Rich当作markup或者emoji代码处理
+_RICH_SYNTAX = re.compile(r"\[|:\S*?:")
+
+
+# 和Rich的换行算法一致：单词放不下的时候在单词的开头换行，比一行还长的单词会被折断，
+# 行尾的空白只会保留到行宽为止
+def wrap_line(line: str, width: int = WIDTH) -> list[str]:
+    breaks: list[int] = []
+    offset = 0
+    for match in _WORD.finditer(line):
+        start, word = match.start(), match.group()
+        word_length = len(word.rstrip())
+        if width - offset >= word_length:
+            offset += len(word)
+        elif word_length > width:
+            chunks = [word[i : i + width] for i in range(0, len(word), width)]
+            for chunk in chunks[:-1]:
+                if start:
+                    breaks.append(start)
+                start += len(chunk)
+            if start:
+                breaks.append(start)
+            offset = len(chunks[-1])
+        elif offset and start:
+            breaks.append(start)
+            offset = len(word)
+    bounds = zip([0, *breaks], [*breaks, len(line)])
+    return [line[start:end][:width] for start, end in bounds]
+
+
+def is_plain(text: str) -> bool:
+    return (
+        text.isascii()
+        and text.replace("\n", "").replace("\t", "").isprintable()
+        and not _RICH_SYNTAX.search(text)
+    )
+
+
+def fill(text: str, width: int = WIDTH) -> str:
+    lines = []
+    for line in text.split("\n"):
+        lines += wrap_line(line.expandtabs(), width)
+    return "\n".join(lines) + "\n"
+
+
+# 和Rich一样判断输出是不是终端
+def is_terminal(file: IO[str]) -> bool:
+    tty_compatible = os.environ.get("TTY_COMPATIBLE", "")
+    if tty_compatible in ("0", "1"):
+        return tty_compatible == "1"
+    force_color = os.environ.get("FORCE_COLOR")
+    if force_color is not None:
+        return force_color != ""
+    isatty = getattr(file, "isatty", None)
+    try:
+        return False if isatty is None else isatty()
+    except ValueError:
+        return False
+
+
+class RichRenderer:
+    def __init__(self, file: IO[str], force_terminal: Optional[bool] = None):
+        # 导入Rich比较耗时，只在真正需要的时候导入
+        from rich.console import Console
+
+        self.file = file
+        self.console = Console(
+            file=file, width=WIDTH, highlight=False, force_terminal=force_terminal
+        )
+
+    def show(self, article: "Article"):
+        self.console.print(article.title, style="bold")
+        if article.summary:
+            self.console.print(f"\n{article.summary}")
+
+    def render(self, article: "Article") -> str:
+        with self.console.capture() as capture:
+            self.show(article)
+        return capture.get()
+
+
+# 只用来渲染文本，不会真的写入，所有非终端的输出流可以共用
+_fallback: Optional[RichRenderer] = None
+
+
+# 输出不是终端的时候，加粗不会产生任何效果，可以不经过Rich直接换行输出
+# 只有遇到非ASCII字符（需要计算字符宽度）或者markup的时候才交给Rich处理
+class PlainRenderer:
+    def __init__(self, file: IO[str]):
+        self.file = file
+
+    def render(self, article: "Article") -> str:
+        global _fallback
+        if not (is_plain(article.title) and is_plain(article.summary)):
+            if _fallback is None:
+                _fallback = RichRenderer(io.StringIO(), force_terminal=False)
+            return _fallback.render(article)
+        if article.summary:
+            return fill(article.title) + fill(f"\n{article.summary}")
+        return fill(article.title)
+
+    def show(self, article: "Article"):
+        self.file.write(self.render(article))
+
+
+# 终端一般只有stdout和stderr，每个终端只创建一次Console
+_terminals: dict[IO[str], RichRenderer] = {}
+
+
+def get_renderer(file: IO[str]) -> PlainRenderer | RichRenderer:
+    if file in _terminals:
+        return _terminals[file]
+    if not is_terminal(file):
+        return PlainRenderer(file)
+    renderer = _terminals[file] = RichRenderer(file)
+    return renderer
@@ -0,0 +1,284 @@
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import httpx
+
+    from ch6.ratelimit import TokenBucket
+
+# 上游不稳定的时候，一次失败就放弃会让尾部延迟和失败率都很高
+# 1. 429和5xx以及网络错误（包括超时）会重试，重试之间的等待时间按指数增长，有上限，
+#    并且在0到这个时间之间随机选取（full jitter），避免所有客户端同时重试
+# 2. 服务器返回了Retry-After的时候按照它等待，要求等待的时间太长的时候直接放弃
+# 3. 对冲请求：一个请求超过最近的p95延迟还没有返回的时候，再发一个相同的请求，使用先返回的那个
+#    这会增加少量的请求，但可以避开偶尔很慢的请求，只对GET这样幂等的请求使用
+# 传入了限速器的时候，每次发出请求（包括重试、对冲请求和重定向的每一跳）之前都要先拿到令牌
+# 所以重定向是手动跟随的，否则随机文章的303会让实际发往上游的请求数是令牌数的两倍
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+# 记录最近的请求延迟，用来计算对冲请求的等待时间
+# 对冲请求中输掉的那个会在后台线程中完成并记录延迟，所以要加锁，否则排序的时候deque可能正在被修改
+class LatencyTracker:
+    def __init__(self, window: int = 100, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+
+@dataclass
+class RetryPolicy:
+    # 总的尝试次数，1表示不重试
+    attempts: int = 3
+    backoff: float = 0.5
+    max_backoff: float = 10.0
+    # Retry-After超过这个时间就不再重试
+    max_retry_after: float = 30.0
+    statuses: frozenset[int] = RETRY_STATUSES
+    hedge: bool = False
+    # 样本不够计算p95的时候使用的对冲等待时间
+    hedge_after: float = 1.0
+    hedge_quantile: float = 0.95
+    latency: LatencyTracker = field(default_factory=LatencyTracker)
+
+    # 第attempt次（从0开始）失败之后的等待时间，返回None表示不再重试
+    def delay(
+        self, attempt: int, response: Optional["httpx.Response"] = None
+    ) -> Optional[float]:
+        if attempt + 1 >= self.attempts:
+            return None
+        if response is not None and "Retry-After" in response.headers:
+            retry_after = parse_retry_after(response.headers["Retry-After"])
+            if retry_after is not None:
+                return retry_after if retry_after <= self.max_retry_after else None
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    def hedge_delay(self) -> float:
+        return self.latency.quantile(self.hedge_quantile) or self.hedge_after
+
+
+# Retry-After可以是秒数，也可以是HTTP日期
+def parse_retry_after(value: str) -> Optional[float]:
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _get(
+    client: "httpx.Client",
+    url,
+    policy: RetryPolicy,
+    limiter: Optional["TokenBucket"] = None,
+    headers: Optional[Mapping[str, str]] = None,
+    follow_redirects: bool = True,
+) -> "httpx.Response":
+    elapsed = 0.0
+    for _ in range(client.max_redirects + 1):
+        if limiter is not None:
+            limiter.acquire()
+        start = time.perf_counter()
+        response = client.get(url, headers=headers, follow_redirects=False)
+        elapsed += time.perf_counter() - start
+        if not (follow_redirects and response.is_redirect):
+            policy.latency.observe(elapsed)
+            return response
+        url = _redirect_url(response)
+    raise _too_many_redirects(response)
+
+
+def _redirect_url(response: "httpx.Response") -> "httpx.URL":
+    return response.url.join(response.headers["Location"])
+
+
+def _too_many_redirects(response: "httpx.Response") -> Exception:
+    import httpx
+
+    return httpx.TooManyRedirects(
+        "Exceeded maximum allowed redirects.", request=response.request
+    )
+
+
+# 对冲请求的结果：响应或者异常
+type _Outcome = tuple[Optional["httpx.Response"], Optional[BaseException]]
+
+
+# 同步的请求没法取消，每个请求在这次调用自己的守护线程中发出，
+# 慢的那个请求会在后台完成（最多等到client的超时），它的连接会回到连接池，也不会阻止解释器退出
+def _hedged(
+    client: "httpx.Client",
+    url,
+    policy: RetryPolicy,
+    limiter: Optional["TokenBucket"] = None,
+    headers: Optional[Mapping[str, str]] = None,
+    follow_redirects: bool = True,
+) -> "httpx.Response":
+    import queue
+
+    args = (client, url, policy, limiter, headers, follow_redirects)
+    results: queue.SimpleQueue[_Outcome] = queue.SimpleQueue()
+
+    def attempt():
+        try:
+            results.put((_get(*args), None))
+        except BaseException as error:
+            results.put((None, error))
+
+    def start():
+        threading.Thread(target=attempt, name="hedge", daemon=True).start()
+
+    start()
+    try:
+        response, error = results.get(timeout=policy.hedge_delay())
+    except queue.Empty:
+        start()
+        response, error = results.get()
+        # 先返回的请求失败了，等另一个
+        if error is not None:
+            response, error = results.get()
+    if error is not None:
+        raise error
+    assert response is not None
+    return response
+
+
+def send(
+    client: "httpx.Client",
+    url,
+    policy: RetryPolicy,
+    limiter: Optional["TokenBucket"] = None,
+    headers: Optional[Mapping[str, str]] = None,
+    follow_redirects: bool = True,
+) -> "httpx.Response":
+    import httpx
+
+    args = (client, url, policy, limiter, headers, follow_redirects)
+    attempt = 0
+    while True:
+        try:
+            if policy.hedge:
+                response = _hedged(*args)
+            else:
+                response = _get(*args)
+        except httpx.TransportError:
+            delay = policy.delay(attempt)
+            if delay is None:
+                raise
+        else:
+            if response.status_code not in policy.statuses:
+                return response
+            delay = policy.delay(attempt, response)
+            if delay is None:
+                return response
+        time.sleep(delay)
+        attempt += 1
+
+
+async def _get_async(
+    client: "httpx.AsyncClient",
+    url,
+    policy: RetryPolicy,
+    limiter: Optional["TokenBucket"] = None,
+    headers: Optional[Mapping[str, str]] = None,
+    follow_redirects: bool = True,
+) -> "httpx.Response":
+    elapsed = 0.0
+    for _ in range(client.max_redirects + 1):
+        if limiter is not None:
+            await limiter.acquire_async()
+        start = time.perf_counter()
+        response = await client.get(url, headers=headers, follow_redirects=False)
+        elapsed += time.perf_counter() - start
+        if not (follow_redirects and response.is_redirect):
+            policy.latency.observe(elapsed)
+            return response
+        url = _redirect_url(response)
+    raise _too_many_redirects(response)
+
+
+# 异步的版本可以在得到结果之后取消另一个请求
+async def _hedged_async(
+    client: "httpx.AsyncClient",
+    url,
+    policy: RetryPolicy,
+    limiter: Optional["TokenBucket"] = None,
+    headers: Optional[Mapping[str, str]] = None,
+    follow_redirects: bool = True,
+) -> "httpx.Response":
+    import asyncio
+
+    args = (client, url, policy, limiter, headers, follow_redirects)
+    tasks = {asyncio.create_task(_get_async(*args))}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=policy.hedge_delay())
+        if not done:
+            tasks.add(asyncio.create_task(_get_async(*args)))
+        error: Optional[BaseException] = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        assert error is not None
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def send_async(
+    client: "httpx.AsyncClient",
+    url,
+    policy: RetryPolicy,
+    limiter: Optional["TokenBucket"] = None,
+    headers: Optional[Mapping[str, str]] = None,
+    follow_redirects: bool = True,
+) -> "httpx.Response":
+    import asyncio
+
+    import httpx
+
+    args = (client, url, policy, limiter, headers, follow_redirects)
+    attempt = 0
+    while True:
+        try:
+            if policy.hedge:
+                response = await _hedged_async(*args)
+            else:
+                response = await _get_async(*args)
+        except httpx.TransportError:
+            delay = policy.delay(attempt)
+            if delay is None:
+                raise
+        else:
+            if response.status_code not in policy.statuses:
+                return response
+            delay = policy.delay(attempt, response)
+            if delay is None:
+                return response
+        await asyncio.sleep(delay)
+        attempt += 1
@@ -0,0 +1,229 @@
+import argparse
+import http.server
+import json
+import random
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import quote, unquote
+
+from ch6.random_wikipedia_article import Article
+
+# 代替Wikipedia接口的本地服务器，测试和基准测试都可以使用，只依赖标准库
+# 1. 使用ThreadingHTTPServer和HTTP/1.1，客户端可以保持连接，每个连接由单独的线程处理
+# 2. 文章在启动的时候就编码成JSON，处理请求的时候只需要写入，本地可以达到每秒数千个请求
+# 3. 可以注入延迟和错误，用来测试超时、重试等逻辑
+# 4. 记录请求数、连接数和同时处理的最大请求数，测试可以检查连接是否被复用，请求是否并发
+# 测试中使用tests/standin.py中用factory-boy生成的文章
+#
+# 单独运行：python -m ch6.standin --port 8000 --articles 1000 --latency 0.05 --error-rate 0.01
+# 然后：python -m ch6.random_wikipedia_article --url http://localhost:8000/page/random/summary
+
+RANDOM_PATH = "/page/random/summary"
+SUMMARY_PATH = "/page/summary/"
+
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor"
+    " incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud"
+).split()
+
+
+@dataclass
+class Faults:
+    # 每个请求增加的延迟，实际的延迟在latency和latency + jitter之间
+    latency: float = 0.0
+    jitter: float = 0.0
+    # 按照这个概率返回error_status，retry_after不为None的时候带上Retry-After响应头
+    error_rate: float = 0.0
+    error_status: int = 503
+    retry_after: Optional[float] = None
+
+
+def encode(article: Article) -> bytes:
+    return json.dumps({"title": article.title, "extract": article.summary}).encode()
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体是分开写的，要关闭Nagle算法，否则保持连接的时候每个请求都要等待延迟确认
+    disable_nagle_algorithm = True
+    server: "StandinServer"
+
+    def do_GET(self):
+        server = self.server
+        server.started()
+        try:
+            self.handle_get()
+        finally:
+            server.finished()
+
+    def handle_get(self):
+        server = self.server
+        faults = server.faults
+        if faults.latency or faults.jitter:
+            time.sleep(faults.latency + random.uniform(0, faults.jitter))
+        if faults.error_rate and random.random() < faults.error_rate:
+            self.respond(faults.error_status, b"", faults.retry_after)
+            return
+
+        path = self.path.partition("?")[0]
+        if path == RANDOM_PATH:
+            title, body = random.choice(server.bodies)
+            if server.redirect:
+                self.send_response(302)
+                self.send_header("Location", SUMMARY_PATH + quote(title))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            else:
+                self.respond(200, body)
+        elif path.startswith(SUMMARY_PATH):
+            body = server.by_title.get(unquote(path.removeprefix(SUMMARY_PATH)))
+            if body is None:
+                self.respond(404, b"")
+            else:
+                self.respond(200, body)
+        else:
+            self.respond(404, b"")
+
+    def respond(self, status: int, body: bytes, retry_after: Optional[float] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if retry_after is not None:
+            self.send_header("Retry-After", f"{retry_after:g}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandinServer(http.server.ThreadingHTTPServer):
+    # 默认的队列长度是5，并发的连接多的时候会被拒绝
+    request_queue_size = 1024
+
+    def __init__(
+        self,
+        articles: Sequence[Article],
+        faults: Optional[Faults] = None,
+        redirect: bool = False,
+        address: tuple[str, int] = ("localhost", 0),
+    ):
+        super().__init__(address, Handler)
+        self.faults = faults or Faults()
+        self.redirect = redirect
+        self._lock = threading.Lock()
+        self.reset_counters()
+        self.articles = articles
+
+    @property
+    def articles(self) -> list[Article]:
+        return self._articles
+
+    @articles.setter
+    def articles(self, articles: Sequence[Article]):
+        self._articles = list(articles)
+        self.bodies = [(article.title, encode(article)) for article in self._articles]
+        self.by_title = dict(self.bodies)
+
+    @property
+    def url(self) -> str:
+        return f"http://localhost:{self.server_port}{RANDOM_PATH}"
+
+    def summary_url(self, title: str) -> str:
+        return f"http://localhost:{self.server_port}{SUMMARY_PATH}{quote(title)}"
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests = 0
+            self.connections = 0
+            self.active = 0
+            self.max_active = 0
+
+    # 每个新的连接调用一次
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+    def started(self):
+        with self._lock:
+            self.requests += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+    def finished(self):
+        with self._lock:
+            self.active -= 1
+
+    def reset(self):
+        self.faults = Faults()
+        self.redirect = False
+        self.reset_counters()
+
+
+# 不依赖faker的简单文章，标题各不相同
+def sample_articles(n: int, seed: Optional[int] = None) -> list[Article]:
+    rng = random.Random(seed)
+
+    def sentence(words: int) -> str:
+        return " ".join(rng.choices(WORDS, k=words)).capitalize() + "."
+
+    return [
+        Article(
+            f"{sentence(3)[:-1]} {i}",
+            " ".join(sentence(rng.randint(8, 16)) for _ in range(5)),
+        )
+        for i in range(n)
+    ]
+
+
+@contextmanager
+def serve(
+    articles: Optional[Sequence[Article]] = None,
+    faults: Optional[Faults] = None,
+    redirect: bool = False,
+) -> Iterator[StandinServer]:
+    if articles is None:
+        articles = sample_articles(100, seed=0)
+    with StandinServer(articles, faults, redirect) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield server
+        finally:
+            server.shutdown()
+            thread.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="ch6.standin")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--articles", type=int, default=100)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--redirect", action="store_true")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=float)
+    args = parser.parse_args(argv)
+
+    faults = Faults(
+        args.latency, args.jitter, args.error_rate, args.error_status, args.retry_after
+    )
+    articles = sample_articles(args.articles, args.seed)
+    with StandinServer(articles, faults, args.redirect, ("", args.port)) as server:
+        print(f"serving {len(articles)} articles at {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
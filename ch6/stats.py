@@ -0,0 +1,165 @@
+import math
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import httpx
+
+# 统计fetch的每个阶段的耗时，用来判断应该优化连接池、解码还是渲染
+# 网络相关的阶段来自httpcore的trace扩展：请求发出之前通过httpx的事件钩子给请求加上trace回调，
+# httpcore会在建立连接、TLS握手、发送请求、接收响应等操作的开始和结束时调用它
+# 解码和构造Article的耗时在parse中记录，渲染的耗时在命令行的--stats模式下记录
+# 没有开启统计的时候，parse中只多了一次字典查找
+#
+# pool:      从发出请求到拿到连接（包括等待连接池中的空闲连接）
+# connect:   建立TCP连接
+# tls:       TLS握手
+# ttfb:      从开始发送请求到收到响应头
+# download:  接收响应体
+# decode:    JSON解码
+# construct: 构造Article
+# render:    渲染输出
+# total:     从发出请求到响应结束
+
+PHASES = (
+    "pool",
+    "connect",
+    "tls",
+    "ttfb",
+    "download",
+    "decode",
+    "construct",
+    "render",
+    "total",
+)
+
+# httpcore的操作名称对应的阶段，操作的开始和结束之间的时间就是这个阶段的耗时
+_OPERATIONS = {
+    "connect_tcp": "connect",
+    "start_tls": "tls",
+    "receive_response_body": "download",
+}
+
+# 和HdrHistogram一样按照对数-线性的方式划分桶：每个2的幂的区间分成64个桶，
+# 相对误差不超过1/64，内存占用只和数值的范围有关，和记录的次数无关
+SUB_BUCKET_BITS = 7
+
+
+def _index(value: int) -> int:
+    shift = max(0, value.bit_length() - SUB_BUCKET_BITS)
+    return (shift << (SUB_BUCKET_BITS - 1)) + (value >> shift)
+
+
+# 桶的中间值
+def _value(index: int) -> int:
+    shift = max(0, (index >> (SUB_BUCKET_BITS - 1)) - 1)
+    mantissa = index - (shift << (SUB_BUCKET_BITS - 1))
+    return ((mantissa << shift) + ((mantissa + 1) << shift)) // 2
+
+
+class Histogram:
+    def __init__(self):
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.min = 0
+        self.max = 0
+
+    # 以纳秒为单位记录
+    def record(self, seconds: float):
+        value = max(0, int(seconds * 1e9))
+        index = _index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.min = value if not self.count else min(self.min, value)
+        self.max = max(self.max, value)
+        self.count += 1
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q / 100 * self.count))
+        if rank >= self.count:
+            return self.max / 1e9
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(max(_value(index), self.min), self.max) / 1e9
+        return self.max / 1e9
+
+
+class FetchStats:
+    def __init__(self):
+        self.histograms = {phase: Histogram() for phase in PHASES}
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, seconds: float):
+        with self._lock:
+            self.histograms[phase].record(seconds)
+
+    # 以毫秒为单位
+    def summary(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {
+                phase: {
+                    "count": histogram.count,
+                    "p50": histogram.percentile(50) * 1000,
+                    "p95": histogram.percentile(95) * 1000,
+                    "p99": histogram.percentile(99) * 1000,
+                    "max": histogram.max / 1e6,
+                }
+                for phase, histogram in self.histograms.items()
+                if histogram.count
+            }
+
+    def report(self) -> str:
+        lines = [f"{'phase':10} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9} (ms)"]
+        for phase, row in self.summary().items():
+            lines.append(
+                f"{phase:10} {row['count']:7d}"
+                f" {row['p50']:9.3f} {row['p95']:9.3f} {row['p99']:9.3f}"
+            )
+        return "\n".join(lines) + "\n"
+
+    # httpx的事件钩子，同步和异步的client分别使用
+    def on_request(self, request: "httpx.Request"):
+        request.extensions["trace"] = _Trace(self)
+        request.extensions["stats"] = self
+
+    async def on_request_async(self, request: "httpx.Request"):
+        request.extensions["trace"] = _AsyncTrace(self)
+        request.extensions["stats"] = self
+
+
+# 每个请求一个，记录操作开始的时间
+class _Trace:
+    def __init__(self, stats: FetchStats):
+        self.stats = stats
+        self.start = time.perf_counter()
+        self.started: dict[str, float] = {}
+        self.first = True
+
+    def __call__(self, name: str, info: dict[str, Any]):
+        now = time.perf_counter()
+        # 第一个事件发生的时候已经拿到了连接
+        if self.first:
+            self.first = False
+            self.stats.record("pool", now - self.start)
+        operation, _, event = name.partition(".")[2].rpartition(".")
+        if event == "started":
+            self.started[operation] = now
+        elif event != "complete":
+            return
+        elif operation in _OPERATIONS:
+            start = self.started.get(operation, now)
+            self.stats.record(_OPERATIONS[operation], now - start)
+        elif operation == "receive_response_headers":
+            start = self.started.get("send_request_headers", now)
+            self.stats.record("ttfb", now - start)
+        elif operation == "response_closed":
+            self.stats.record("total", now - self.start)
+
+
+class _AsyncTrace(_Trace):
+    async def __call__(self, name: str, info: dict[str, Any]):
+        super().__call__(name, info)
@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import time
+from collections.abc import Iterable
+from typing import Optional
+
+from ch6.random_wikipedia_article import Article
+
+# 把获取的文章保存在本地的SQLite中，可以按标题查找，也可以全文搜索
+# 1. 使用WAL模式，读不会阻塞写，synchronous=NORMAL在WAL模式下不会损坏数据库，但提交要快得多
+# 2. 文章先放在缓冲区中，攒够一批之后在一个事务中用executemany写入，而不是每篇文章提交一次
+# 3. 标题是唯一的，重复的文章只更新内容
+# 4. FTS5的外部内容表：全文索引不再保存一份文本，由触发器和articles表保持同步
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL UNIQUE,
+    summary TEXT NOT NULL,
+    stored_at REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, summary, content='articles', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, summary)
+    VALUES (new.id, new.title, new.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, summary)
+    VALUES ('delete', old.id, old.title, old.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, summary)
+    VALUES ('delete', old.id, old.title, old.summary);
+    INSERT INTO articles_fts (rowid, title, summary)
+    VALUES (new.id, new.title, new.summary);
+END;
+"""
+
+# 内容没有变化的时候不更新，这样也不会触发重建索引
+UPSERT = """
+INSERT INTO articles (title, summary, stored_at) VALUES (?, ?, ?)
+ON CONFLICT (title) DO UPDATE SET
+    summary = excluded.summary, stored_at = excluded.stored_at
+WHERE summary != excluded.summary
+"""
+
+# bm25越小越相关，标题中的匹配比摘要中的更重要
+SEARCH = """
+SELECT articles.title, articles.summary FROM articles_fts
+JOIN articles ON articles.id = articles_fts.rowid
+WHERE articles_fts MATCH ?
+ORDER BY bm25(articles_fts, 10.0, 1.0)
+LIMIT ?
+"""
+
+
+# 把用户输入的每个词都作为短语，这样引号、连字符等不会被当作FTS5的语法
+def quote(query: str) -> str:
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+class ArticleStore:
+    def __init__(self, path: str | os.PathLike[str], batch_size: int = 1000):
+        self.batch_size = batch_size
+        self._pending: list[tuple[str, str, float]] = []
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, article: Article):
+        self._pending.append((article.title, article.summary, time.time()))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, articles: Iterable[Article]):
+        for article in articles:
+            self.add(article)
+        self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        with self._db:
+            self._db.executemany(UPSERT, self._pending)
+        self._pending.clear()
+
+    def get(self, title: str) -> Optional[Article]:
+        self.flush()
+        row = self._db.execute(
+            "SELECT title, summary FROM articles WHERE title = ?", (title,)
+        ).fetchone()
+        return Article(*row) if row else None
+
+    def search(self, query: str, limit: int = 20, raw: bool = False) -> list[Article]:
+        self.flush()
+        match = query if raw else quote(query)
+        if not match:
+            return []
+        rows = self._db.execute(SEARCH, (match, limit)).fetchall()
+        return [Article(*row) for row in rows]
+
+    def __len__(self) -> int:
+        self.flush()
+        return self._db.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
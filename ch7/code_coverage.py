@@ -8,7 +8,7 @@
 # 使用命令运行： uv run coverage run -m pytest，会生成一个.coverage文件，这里存储了测试覆盖率数据
 # 使用命令查看报告： uv run coverage report
 
-# 对于那些要支持多版本的代码（如ch4/random_wikipedia_article.py的7-10行），需要切换不同的环境，多次运行覆盖率分析
+# 对于那些要支持多版本的代码（如ch4/random_wikipedia_article.py的build_user_agent中根据版本导入metadata的代码），需要切换不同的环境，多次运行覆盖率分析
 # Coverage.py默认是覆盖现有的覆盖率数据的，所以要要在命令中加入--append参数让后面执行的覆盖率分析数据追加到现有的数据中
 # 但是，使用append模式的问题是，你需要在运行新的测试覆盖率分析之前必须使用coverage erase命令清除现有的数据
 # 更好的选择是在配置中加上parallel=true，它的作用是让每次覆盖率分析产生的结果存放在不同的文件中。
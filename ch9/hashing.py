@@ -0,0 +1,82 @@
+import hashlib
+import os
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+# ch9/formatter.py中的frobnicate每次只计算一个字符串的hash，在Python的循环中调用它，
+# 每一项都要调用一次Python函数，查找hashlib.md5，并从头创建OpenSSL的hash对象
+# hash_many在一个紧凑的循环中处理所有输入：方法都预先绑定到局部变量，hash对象从一个空的原型copy出来，
+# 比重新创建更快。对短的输入，时间大部分花在hashlib的C代码中（hexdigest最多），所以只能快10%左右
+# hashlib在数据比较大（超过2047字节）的时候会释放GIL，所以大的输入会放到线程池中计算
+# 只使用hashlib的公开构造函数，不使用CPython私有的_md5等模块，它们会绕过OpenSSL和FIPS等策略
+ALGORITHMS: dict[str, Callable[..., Any]] = {
+    "md5": hashlib.md5,
+    "sha256": hashlib.sha256,
+    "blake2b": hashlib.blake2b,
+}
+
+# 超过这个大小的输入在线程池中计算
+LARGE_INPUT = 64 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+
+def _constructor(algo: str) -> Callable[..., "hashlib._Hash"]:
+    try:
+        return ALGORITHMS[algo]
+    except KeyError:
+        raise ValueError(f"unsupported algorithm: {algo!r}") from None
+
+
+def hash_many(
+    values: Iterable[str | bytes],
+    algo: str = "md5",
+    workers: Optional[int] = None,
+) -> list[str]:
+    new = _constructor(algo)
+    copy = new().copy
+    digests: list[str] = []
+    append = digests.append
+    # 大的输入先占一个位置，最后在线程池中计算
+    large: list[tuple[int, bytes]] = []
+    for value in values:
+        data = value.encode() if type(value) is str else value
+        if len(data) >= LARGE_INPUT:
+            large.append((len(digests), data))
+            append("")
+            continue
+        digest = copy()
+        digest.update(data)
+        append(digest.hexdigest())
+    if not large:
+        return digests
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda item: new(item[1]).hexdigest(), large)
+        for (i, _), digest in zip(large, results):
+            digests[i] = digest
+    return digests
+
+
+# 使用同一个缓冲区分块读取文件，通过memoryview把读到的部分传给hash对象，不会产生额外的拷贝
+def hash_file(
+    path: str | os.PathLike[str], algo: str = "md5", chunk_size: int = CHUNK_SIZE
+) -> str:
+    digest = _constructor(algo)()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as file:
+        while size := file.readinto(buffer):
+            digest.update(view[:size])
+    return digest.hexdigest()
+
+
+# 读取文件和计算hash都会释放GIL，所以多个文件可以在线程池中并行处理
+def hash_files(
+    paths: Iterable[str | os.PathLike[str]],
+    algo: str = "md5",
+    workers: Optional[int] = None,
+) -> list[str]:
+    _constructor(algo)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda path: hash_file(path, algo), paths))
@@ -0,0 +1,176 @@
+import argparse
+import hashlib
+import json
+import os
+import shlex
+import sqlite3
+import sys
+import time
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from ch9.hashing import hash_files
+from ch9.runner import Job, OutputCallback, Report, run_jobs
+
+# pre-commit每次都会对所有暂存的文件运行所有的hook，即使文件的内容和上次检查通过的时候完全一样
+# 这里把检查通过的结果按照(hook id, hook的版本和参数, 文件内容的hash)记录在SQLite中，
+# 下次只对内容变化过的文件运行hook，大部分文件没有修改的时候，提交时几乎不需要等待
+#
+# 可以作为本地hook使用，pre-commit会把文件名追加到entry的后面：
+#   - repo: local
+#     hooks:
+#       - id: ruff-check
+#         name: ruff check
+#         entry: python -m ch9.hook_cache ruff-check 0.13.0 "ruff check --fix --exit-non-zero-on-fix"
+#         language: system
+#         types: [python]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS passed (
+    hook TEXT NOT NULL,
+    fingerprint BLOB NOT NULL,
+    digest BLOB NOT NULL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (hook, fingerprint, digest)
+);
+CREATE INDEX IF NOT EXISTS passed_used_at ON passed (used_at);
+"""
+
+# 删除最久没有使用的那些记录，同一批写入的记录使用时间相同，再按照写入的顺序（rowid）删除
+EVICT = """
+DELETE FROM passed WHERE rowid IN (
+    SELECT rowid FROM passed ORDER BY used_at, rowid LIMIT ?
+)
+"""
+# 表结构变化的时候修改这个值，旧的缓存会被清空
+SCHEMA_VERSION = 2
+
+# 内容hash只用来判断文件有没有变化，不需要抗碰撞，MD5只占16字节并且计算最快
+ALGORITHM = "md5"
+# 每个hook进程最多处理的文件数，和pre-commit一样把文件分批并行处理
+BATCH_SIZE = 64
+
+
+@dataclass(frozen=True)
+class Hook:
+    id: str
+    version: str
+    command: tuple[str, ...]
+    timeout: Optional[float] = None
+
+    def __post_init__(self):
+        object.__setattr__(self, "command", tuple(self.command))
+
+    # 版本或者参数变化之后，之前的检查结果就不再有效
+    @property
+    def fingerprint(self) -> bytes:
+        data = json.dumps([self.version, self.command]).encode()
+        return hashlib.md5(data).digest()
+
+
+class HookCache:
+    def __init__(self, path: str | os.PathLike[str], max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._db = sqlite3.connect(path)
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            with self._db:
+                self._db.execute("DROP TABLE IF EXISTS passed")
+                self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # 返回已经检查通过的那些hash，同时更新它们的使用时间
+    def passed(self, hook: Hook, digests: Iterable[bytes]) -> set[bytes]:
+        key = (hook.id, hook.fingerprint)
+        found = set()
+        for digest in set(digests):
+            row = self._db.execute(
+                "SELECT 1 FROM passed WHERE hook = ? AND fingerprint = ? AND digest = ?",
+                (*key, digest),
+            ).fetchone()
+            if row is not None:
+                found.add(digest)
+        self.record(hook, found)
+        return found
+
+    def record(self, hook: Hook, digests: Iterable[bytes]):
+        now = time.time()
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO passed VALUES (?, ?, ?, ?)",
+                [(hook.id, hook.fingerprint, digest, now) for digest in digests],
+            )
+            # 只保留最近使用过的max_entries条记录
+            (count,) = self._db.execute("SELECT COUNT(*) FROM passed").fetchone()
+            if count > self.max_entries:
+                self._db.execute(EVICT, (count - self.max_entries,))
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM passed").fetchone()[0]
+
+
+def digests(files: Sequence[str]) -> list[bytes]:
+    return [bytes.fromhex(digest) for digest in hash_files(files, ALGORITHM)]
+
+
+def run_hook(
+    hook: Hook,
+    files: Sequence[str],
+    cache: HookCache,
+    max_parallel: Optional[int] = None,
+    on_output: Optional[OutputCallback] = None,
+) -> Report:
+    passed = cache.passed(hook, before := digests(files))
+    changed = [file for file, digest in zip(files, before) if digest not in passed]
+    batches = [changed[i : i + BATCH_SIZE] for i in range(0, len(changed), BATCH_SIZE)]
+    jobs = [Job((*hook.command, *batch), hook.timeout, hook.id) for batch in batches]
+    report = run_jobs(jobs, max_parallel, on_output)
+
+    # hook可能会修改文件（如formatter），所以记录的是运行之后的内容
+    # 一批文件中只要有一个没有通过，就不知道哪些文件是好的，这一批都不记录
+    for batch, result in zip(batches, report.results):
+        if result.ok:
+            cache.record(hook, digests(batch))
+    return report
+
+
+def default_cache_path() -> Path:
+    if Path(".git").is_dir():
+        return Path(".git", "hook-cache.sqlite")
+    return Path(".hook-cache.sqlite")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="ch9.hook_cache")
+    parser.add_argument("id", help="hook id")
+    parser.add_argument("version", help="hook version, e.g. the repo rev")
+    parser.add_argument("command", help="command line, the files are appended")
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--cache", type=Path, default=default_cache_path())
+    parser.add_argument("--timeout", type=float)
+    parser.add_argument("--max-entries", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    hook = Hook(args.id, args.version, tuple(shlex.split(args.command)), args.timeout)
+    with HookCache(args.cache, args.max_entries) as cache:
+        report = run_hook(
+            hook,
+            args.files,
+            cache,
+            on_output=lambda job, stream, line: getattr(sys, stream).write(line),
+        )
+    sys.exit(report.returncode)
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,7 @@ run("myscript.py")
 # 8 |         args.insert(0, "--force")
 #   |
 # help: Replace with `None`; initialize within function
+# ch9/runner.py中的build_command是修正后的版本，runner还可以并行地运行多个命令
 
 # 在Python的历史上，最开始流行的linter是Pylint和Flake8.
 # 前者会对代码进行详尽的检查，使用其自带的数百多个检查。
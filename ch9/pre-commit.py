@@ -48,3 +48,6 @@
 # 如果想跳过pre-commit检查，可以使用git commit --no-verify或git commit -n命令
 # 但不建议经常使用这个选项，因为它会绕过所有的检查，所以可以使用SKIP环境变量来有选择地跳过某些hook
 # 例如，SKIP=ruff git commit会跳过ruff
+
+# pre-commit每次都会对所有暂存的文件重新运行hook，ch9/hook_cache.py会记录检查通过的文件内容的hash，
+# 只对内容有变化的文件运行hook，用法见其中的注释
@@ -0,0 +1,174 @@
+import asyncio
+import codecs
+import os
+import time
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+from typing import Optional
+
+# ch9/linter.py中的run一次只能运行一个命令，并且会修改共享的默认参数
+# 这里的runner可以并行运行多个命令（如formatter，linter，build），同时运行的进程数有上限，
+# 每个命令有单独的超时时间，输出会按行实时地传给回调，最后汇总所有命令的退出状态
+
+# 按块读取输出，自己切分成行：StreamReader.readline遇到超过64KiB的行会抛出ValueError
+CHUNK_SIZE = 65536
+
+# 和timeout(1)一样，超时的任务返回124
+TIMEOUT_RETURNCODE = 124
+
+# 回调的参数：任务，"stdout"或"stderr"，一行输出
+OutputCallback = Callable[["Job", str, str], None]
+
+
+@dataclass(frozen=True)
+class Job:
+    command: tuple[str, ...]
+    timeout: Optional[float] = None
+    name: str = ""
+
+    def __post_init__(self):
+        object.__setattr__(self, "command", tuple(self.command))
+
+    @property
+    def label(self) -> str:
+        return self.name or " ".join(self.command)
+
+
+@dataclass
+class JobResult:
+    job: Job
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    duration: float
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+
+@dataclass
+class Report:
+    results: list[JobResult] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.results)
+
+    # 和shell一样，有任何一个任务失败就返回非0的状态码
+    # 超时返回124，被信号终止（returncode为负数）返回128 + 信号编号
+    @property
+    def returncode(self) -> int:
+        for result in self.results:
+            if result.timed_out:
+                return TIMEOUT_RETURNCODE
+            if not result.ok:
+                if result.returncode is not None and result.returncode < 0:
+                    return 128 - result.returncode
+                return result.returncode or 1
+        return 0
+
+
+# 修正linter.run的bug：每次调用都新建list，不会修改调用方传入的参数
+def build_command(
+    command: str, args: Optional[Sequence[str]] = None, force: bool = False
+) -> tuple[str, ...]:
+    return (command, *(["--force"] if force else []), *(args or ()))
+
+
+async def _read_lines(
+    stream: asyncio.StreamReader,
+    job: Job,
+    name: str,
+    lines: list[str],
+    on_output: Optional[OutputCallback],
+):
+    # 增量解码，多字节的字符可能被分在两个块中
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    while True:
+        chunk = await stream.read(CHUNK_SIZE)
+        pending += decoder.decode(chunk, final=not chunk)
+        *complete, pending = pending.split("\n")
+        for text in complete:
+            text += "\n"
+            lines.append(text)
+            if on_output is not None:
+                on_output(job, name, text)
+        if not chunk:
+            break
+    # 最后一行没有换行符
+    if pending:
+        lines.append(pending)
+        if on_output is not None:
+            on_output(job, name, pending)
+
+
+async def run_job(job: Job, on_output: Optional[OutputCallback] = None) -> JobResult:
+    start = time.perf_counter()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *job.command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except OSError as error:
+        # 和shell一样，命令不存在的时候返回127
+        return JobResult(job, 127, "", f"{error}\n", time.perf_counter() - start)
+    stdout: list[str] = []
+    stderr: list[str] = []
+
+    # 使用了PIPE，所以stdout和stderr一定存在
+    assert process.stdout is not None and process.stderr is not None
+    out, err = process.stdout, process.stderr
+
+    async def communicate():
+        await asyncio.gather(
+            _read_lines(out, job, "stdout", stdout, on_output),
+            _read_lines(err, job, "stderr", stderr, on_output),
+        )
+        return await process.wait()
+
+    timed_out = False
+    try:
+        returncode = await asyncio.wait_for(communicate(), job.timeout)
+    except TimeoutError:
+        timed_out = True
+    finally:
+        # 超时，读取输出出错或者被取消的时候，都不能留下还在运行的子进程
+        if process.returncode is None:
+            process.kill()
+        returncode = await process.wait()
+
+    return JobResult(
+        job,
+        returncode,
+        "".join(stdout),
+        "".join(stderr),
+        time.perf_counter() - start,
+        timed_out,
+    )
+
+
+async def run_jobs_async(
+    jobs: Iterable[Job],
+    max_parallel: Optional[int] = None,
+    on_output: Optional[OutputCallback] = None,
+) -> Report:
+    semaphore = asyncio.Semaphore(max_parallel or os.cpu_count() or 1)
+
+    async def bounded(job: Job) -> JobResult:
+        async with semaphore:
+            return await run_job(job, on_output)
+
+    results = await asyncio.gather(*(bounded(job) for job in jobs))
+    return Report(list(results))
+
+
+def run_jobs(
+    jobs: Iterable[Job],
+    max_parallel: Optional[int] = None,
+    on_output: Optional[OutputCallback] = None,
+) -> Report:
+    return asyncio.run(run_jobs_async(jobs, max_parallel, on_output))
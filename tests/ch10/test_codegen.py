@@ -0,0 +1,72 @@
+import pytest
+
+from ch10.codegen import _code_cache, dataclass
+
+
+@dataclass(eq=True, repr=True, hash=True, slots=True, match_args=True)
+class Point:
+    x: int
+    y: int = 0
+
+
+@dataclass
+class Plain:
+    x: int
+    y: int
+
+
+def test_init():
+    assert (Point(1).x, Point(1).y) == (1, 0)
+    assert not hasattr(Point(1), "__dict__")
+    assert Point.__init__.__annotations__ == {"x": int, "y": int, "return": None}
+
+
+def test_generated_methods():
+    assert Point(1, 2) == Point(1, 2)
+    assert Point(1, 2) != Point(2, 1)
+    assert repr(Point(1, 2)) == "Point(x=1, y=2)"
+    assert hash(Point(1, 2)) == hash((1, 2))
+    match Point(1, 2):
+        case Point(x, y):
+            assert (x, y) == (1, 2)
+
+
+def test_defaults_only_generate_init():
+    assert Plain(1, 2) != Plain(1, 2)
+    assert "__repr__" not in Plain.__dict__
+
+
+def test_code_is_shared():
+    assert Plain.__init__.__code__ is Point.__init__.__code__
+    assert ("__init__", ("x", "y")) in _code_cache
+
+
+def test_non_default_after_default():
+    with pytest.raises(TypeError):
+
+        @dataclass
+        class Invalid:
+            x: int = 0
+            y: int
+
+
+def test_slots_keep_qualname_and_super():
+    class Base:
+        def describe(self):
+            return "base"
+
+    @dataclass(repr=True, slots=True)
+    class Inner(Base):
+        x: int
+
+        def describe(self):
+            return f"inner {super().describe()}"
+
+        @property
+        def cls(self):
+            return __class__
+
+    assert Inner.__qualname__.endswith("<locals>.Inner")
+    assert repr(Inner(1)) == f"{Inner.__qualname__}(x=1)"
+    assert Inner(1).describe() == "inner base"
+    assert Inner(1).cls is Inner
@@ -0,0 +1,25 @@
+from ch6.random_wikipedia_article import Article
+from ch10.converter import ConverterRegistry, registry
+
+data = [
+    {"title": "Lorem Ipsum", "extract": "Lorem ipsum dolor sit amet."},
+    {"title": "test", "extract": ""},
+]
+articles = [Article("Lorem Ipsum", "Lorem ipsum dolor sit amet."), Article("test")]
+
+
+def test_structure_many():
+    assert articles == registry.structure_many(data, Article)
+
+
+def test_unstructure_roundtrip():
+    assert data == registry.unstructure_many(articles, Article)
+    assert data[0] == registry.unstructure(articles[0])
+
+
+def test_hooks_are_cached():
+    converters = ConverterRegistry()
+    assert converters.structure_fn(Article) is converters.structure_fn(Article)
+    assert Article("a", "b") == converters.structure(
+        {"title": "a", "summary": "b"}, Article
+    )
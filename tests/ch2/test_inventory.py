@@ -0,0 +1,31 @@
+from ch2 import inventory
+
+
+def test_distributions(tmp_path):
+    (tmp_path / "rich-14.1.0.dist-info").mkdir()
+    dist_info = tmp_path / "pytest_httpserver-1.1.3.dist-info"
+    dist_info.mkdir()
+    (dist_info / "METADATA").write_text(
+        "Metadata-Version: 2.4\nName: pytest-httpserver\nVersion: 1.1.3\n\nbody\n"
+    )
+    egg_info = tmp_path / "legacy.egg-info"
+    egg_info.mkdir()
+    (egg_info / "PKG-INFO").write_text("Name: Legacy-Package\nVersion: 1.0\n")
+
+    assert list(inventory.distributions([str(tmp_path)])) == [
+        {"name": "Legacy-Package", "version": "1.0"},
+        {"name": "pytest-httpserver", "version": "1.1.3"},
+        {"name": "rich", "version": "14.1.0"},
+    ]
+
+
+def test_stdlib_modules():
+    modules = inventory.stdlib_modules()
+    assert modules["sys"] == "built-in"
+    assert modules["json"].endswith("__init__.py")
+
+
+def test_inventory_cache(tmp_path, monkeypatch):
+    report = inventory.inventory(tmp_path)
+    monkeypatch.setattr(inventory, "build_report", None)
+    assert inventory.inventory(tmp_path) == report
@@ -0,0 +1,39 @@
+from ch3 import package
+
+PYPROJECT = """\
+[project]
+name = "tiny"
+version = "0.1"
+
+[build-system]
+requires = ["hatchling"]
+build-backend = "hatchling.build"
+"""
+
+
+def test_build_skips_unchanged_project(tmp_path, monkeypatch):
+    # build会切换工作目录，测试结束后由monkeypatch恢复
+    monkeypatch.chdir(tmp_path)
+    project = tmp_path / "tiny"
+    (project / "tiny").mkdir(parents=True)
+    (project / "pyproject.toml").write_text(PYPROJECT)
+    module = project / "tiny" / "__init__.py"
+    module.write_text("VALUE = 1\n")
+
+    assert "built tiny-0.1-py" in package.build(project)
+    assert "up to date" in package.build(project)
+
+    module.write_text("VALUE = 2\n")
+    assert "built tiny-0.1-py" in package.build(project)
+    assert "up to date" in package.build(project)
+
+
+def test_fingerprint_ignores_build_output(tmp_path):
+    (tmp_path / "module.py").write_text("VALUE = 1\n")
+    before = package.fingerprint(tmp_path)
+    for name in ("dist", "__pycache__", ".git"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "file").write_text("ignored")
+    assert package.fingerprint(tmp_path) == before
+    (tmp_path / "module.py").write_text("VALUE = 2\n")
+    assert package.fingerprint(tmp_path) != before
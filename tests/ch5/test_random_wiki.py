@@ -154,6 +154,10 @@ def test_fetch2(article2, serve2):
     assert article2 == fetch(serve2(article2))
 
 
+# ch6/standin.py是一个更完整的版本：多线程，支持保持连接，可以注入延迟和错误，
+# tests/conftest.py中的standin fixture在整个测试会话中共用同一个服务器
+
+
 # 但相比自己实现，使用现有的pytest插件是更好的选择
 # pytest-httpserver这个插件就提供了比httpserver更加强大的功能，且它是久经考验的
 from pytest_httpserver import HTTPServer
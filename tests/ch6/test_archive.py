@@ -0,0 +1,74 @@
+import mmap
+
+import pytest
+
+from ch6.archive import HEADER, ArticleArchive, write_archive
+from ch6.random_wikipedia_article import Article
+
+articles = [
+    Article("Lorem Ipsum", "Lorem ipsum dolor sit amet."),
+    Article(),
+    Article("Zürich", "Zürich ist die größte Stadt der Schweiz."),
+    Article("Aachen", "Aachen is a city in Germany."),
+    Article("Lorem Ipsum", "A duplicate title."),
+]
+
+
+@pytest.fixture
+def archive(tmp_path):
+    path = tmp_path / "articles.archive"
+    write_archive(path, articles)
+    with ArticleArchive(path) as archive:
+        yield archive
+
+
+def test_roundtrip(archive):
+    assert len(archive) == len(articles)
+    assert list(archive) == articles
+    assert archive[-1] == articles[-1]
+    assert archive[1:3] == articles[1:3]
+    with pytest.raises(IndexError):
+        archive[len(articles)]
+
+
+def test_lookup_by_title(archive):
+    assert archive.get("Zürich") == articles[2]
+    assert archive.get("Aachen") == articles[3]
+    assert archive.find("") == 1
+    # 重复的标题返回先写入的那个
+    assert archive.find("Lorem Ipsum") == 0
+    assert archive.get("Berlin") is None
+    assert archive.get("Zz") is None
+
+
+def test_zero_copy(archive):
+    title = archive.title_bytes(2)
+    assert isinstance(title.obj, mmap.mmap)
+    assert title == "Zürich".encode()
+    assert bytes(archive.summary_bytes(0)) == b"Lorem ipsum dolor sit amet."
+    title.release()
+
+
+def test_empty(tmp_path):
+    path = tmp_path / "empty.archive"
+    write_archive(path, [])
+    with ArticleArchive(path) as archive:
+        assert len(archive) == 0
+        assert archive.get("anything") is None
+
+
+def test_not_an_archive(tmp_path):
+    path = tmp_path / "bad.archive"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        ArticleArchive(path)
+
+
+@pytest.mark.parametrize("size", [0, 10, HEADER.size, -1])
+def test_truncated(tmp_path, size):
+    path = tmp_path / "articles.archive"
+    write_archive(path, articles)
+    data = path.read_bytes()
+    path.write_bytes(data[:size] if size else b"")
+    with pytest.raises(ValueError):
+        ArticleArchive(path)
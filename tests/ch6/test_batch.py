@@ -0,0 +1,28 @@
+import pytest
+
+from ch6.batch import ArticleBatch, SlottedArticle
+from ch6.random_wikipedia_article import Article
+
+articles = [
+    Article(),
+    Article("test"),
+    Article("Lorem Ipsum", "Lorem ipsum dolor sit amet."),
+    Article("Zürich", "Zürich ist die größte Stadt der Schweiz."),
+]
+
+
+def test_batch_roundtrip():
+    batch = ArticleBatch(articles)
+    assert len(batch) == len(articles)
+    assert list(batch) == articles
+    assert batch[-1] == articles[-1]
+    assert list(batch[1:3]) == articles[1:3]
+
+
+def test_batch_index_error():
+    with pytest.raises(IndexError):
+        ArticleBatch(articles)[len(articles)]
+
+
+def test_slotted_article():
+    assert not hasattr(SlottedArticle("test"), "__dict__")
@@ -0,0 +1,76 @@
+import pytest
+from pytest_httpserver import HTTPServer
+from werkzeug import Response
+
+from ch6.cache import ResponseCache
+from ch6.random_wikipedia_article import Article, create_client, fetch
+
+article = Article("Lorem Ipsum", "Lorem ipsum dolor sit amet.")
+
+
+@pytest.fixture
+def url(httpserver: HTTPServer):
+    data = {"title": article.title, "extract": article.summary}
+    summary = httpserver.url_for("/summary/Lorem_Ipsum")
+    httpserver.expect_request(
+        "/summary/Lorem_Ipsum", headers={"If-None-Match": '"v1"'}
+    ).respond_with_response(Response(status=304))
+    httpserver.expect_request("/summary/Lorem_Ipsum").respond_with_json(
+        data, headers={"ETag": '"v1"'}
+    )
+    httpserver.expect_request("/random").respond_with_response(
+        Response(status=303, headers={"Location": summary})
+    )
+    return httpserver.url_for("/random")
+
+
+def test_cache_hit(url, tmp_path):
+    with ResponseCache(str(tmp_path / "cache.db")) as cache, create_client() as client:
+        assert [article] * 3 == [fetch(url, client, cache) for _ in range(3)]
+        stats = cache.stats()
+    assert (stats["misses"], stats["hits"], stats["entries"]) == (1, 2, 1)
+
+
+def test_cache_revalidation(url, tmp_path):
+    with ResponseCache(str(tmp_path / "cache.db"), ttl=0) as cache:
+        assert [article] * 2 == [fetch(url, cache=cache) for _ in range(2)]
+        assert (cache.misses, cache.revalidations) == (1, 1)
+
+
+def test_cache_eviction(tmp_path):
+    with ResponseCache(str(tmp_path / "cache.db"), max_bytes=10) as cache:
+        for name in ["a", "b", "c"]:
+            cache.store(name, name, b"12345", {})
+        assert cache.lookup("a") is None
+        assert cache.lookup("c").body == b"12345"
+        assert cache.stats()["bytes"] == 10
+
+
+def test_random_url_is_not_cached(standin, tmp_path):
+    with ResponseCache(str(tmp_path / "cache.db")) as cache, create_client() as client:
+        articles = [fetch(standin.url, client, cache) for _ in range(10)]
+        stats = cache.stats()
+    assert len({a.title for a in articles}) > 1
+    assert (stats["hits"], stats["entries"]) == (0, 0)
+
+
+@pytest.mark.parametrize(
+    ("cache_control", "hits", "revalidations"),
+    [("max-age=3600", 1, 0), ("no-cache", 0, 1), ("no-store", 0, 0)],
+)
+def test_cache_control(
+    httpserver: HTTPServer, tmp_path, cache_control, hits, revalidations
+):
+    data = {"title": article.title, "extract": article.summary}
+    headers = {"ETag": '"v1"', "Cache-Control": cache_control}
+    httpserver.expect_request(
+        "/summary/Lorem_Ipsum", headers={"If-None-Match": '"v1"'}
+    ).respond_with_response(Response(status=304, headers=headers))
+    httpserver.expect_request("/summary/Lorem_Ipsum").respond_with_json(
+        data, headers=headers
+    )
+    url = httpserver.url_for("/summary/Lorem_Ipsum")
+    # ttl=0时只有max-age可以让第二次请求命中
+    with ResponseCache(str(tmp_path / "cache.db"), ttl=0) as cache:
+        assert [article] * 2 == [fetch(url, cache=cache) for _ in range(2)]
+        assert (cache.hits, cache.revalidations) == (hits, revalidations)
@@ -0,0 +1,17 @@
+import pytest
+
+from ch6 import decoder
+
+body = b'{"title": "Lorem Ipsum", "extract": "Lorem ipsum dolor sit amet."}'
+
+
+@pytest.mark.parametrize("backend", decoder.DECODERS)
+def test_loads(backend):
+    data = decoder.get_decoder(backend)(body)
+    assert data == {"title": "Lorem Ipsum", "extract": "Lorem ipsum dolor sit amet."}
+
+
+def test_decode_summary():
+    assert ("Lorem Ipsum", "Lorem ipsum dolor sit amet.") == decoder.decode_summary(
+        body
+    )
@@ -0,0 +1,50 @@
+import asyncio
+import json
+from dataclasses import asdict
+
+import pytest
+from pytest_httpserver import HTTPServer
+
+from ch6.random_wikipedia_article import (
+    Article,
+    create_client,
+    fetch,
+    fetch_many,
+    main,
+)
+
+article = Article("Lorem Ipsum", "Lorem ipsum dolor sit amet.")
+
+
+@pytest.fixture
+def url(httpserver: HTTPServer):
+    data = {"title": article.title, "extract": article.summary}
+    httpserver.expect_request("/").respond_with_json(data)
+    return httpserver.url_for("/")
+
+
+def test_fetch_with_client(url):
+    with create_client(max_connections=1) as client:
+        assert [article, article] == [fetch(url, client), fetch(url, client)]
+    assert client.is_closed
+
+
+def test_fetch_many(url):
+    async def collect():
+        return [article async for article in fetch_many(url, 5, concurrency=2)]
+
+    assert [article] * 5 == asyncio.run(collect())
+
+
+def test_fetch_many_early_exit(url):
+    async def first():
+        async for article in fetch_many(url, 100, concurrency=4):
+            return article
+
+    assert article == asyncio.run(first())
+
+
+def test_main_jsonl(url, capsys):
+    main(["--url", url, "--count", "3", "--jsonl"])
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line) for line in lines] == [asdict(article)] * 3
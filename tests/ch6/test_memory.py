@@ -0,0 +1,16 @@
+import pytest
+
+from ch6.memory import STAGES
+
+
+def test_memory_budget(standin, memory_budget):
+    report = memory_budget(standin.url, peak=512 * 1024, leaked=4 * 1024)
+    assert list(report.stages) == list(STAGES)
+    assert report.articles == 50
+    assert report.stages["show"].peak > 0
+    assert "top allocations" in report.format()
+
+
+def test_memory_budget_exceeded(standin, memory_budget):
+    with pytest.raises(AssertionError, match="peak"):
+        memory_budget(standin.url, peak=1, n=5)
@@ -0,0 +1,40 @@
+import cProfile
+import pstats
+
+import pytest
+
+from ch6.profiling import collapse
+from ch6.random_wikipedia_article import main
+
+
+def fib(n):
+    return n if n < 2 else fib(n - 1) + fib(n - 2)
+
+
+def work():
+    return [fib(15) for _ in range(20)]
+
+
+def test_collapse_keeps_total_time():
+    profiler = cProfile.Profile()
+    profiler.runcall(work)
+    stats = pstats.Stats(profiler)
+    stacks = collapse(stats)
+    assert sum(stacks.values()) / 1e6 == pytest.approx(stats.total_tt, rel=0.05)
+    assert any("work (" in stack and "fib (" in stack for stack in stacks)
+
+
+@pytest.mark.parametrize("mode", ["cprofile", "sample"])
+def test_main_profile(mode, standin, tmp_path, capsys):
+    prefix = tmp_path / "profile"
+    main(
+        ["--url", standin.url, "--count", "20"]
+        + ["--profile", mode, "--profile-output", str(prefix)]
+    )
+    assert "wrote" in capsys.readouterr().err
+    lines = (tmp_path / "profile.collapsed").read_text().splitlines()
+    assert lines
+    for line in lines:
+        _, weight = line.rsplit(" ", 1)
+        assert int(weight) > 0
+    assert (tmp_path / "profile.pstats").exists() == (mode == "cprofile")
@@ -0,0 +1,89 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ch6.cache import ResponseCache
+from ch6.random_wikipedia_article import create_client, fetch, fetch_many
+from ch6.ratelimit import SharedTokenBucket, TokenBucket
+
+# 速率为50的时候，第一个请求立即发出，之后每个请求间隔20ms
+RATE = 50
+N = 11
+MIN_ELAPSED = (N - 1) / RATE * 0.9
+
+
+def test_threads():
+    limiter = TokenBucket(RATE)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(lambda _: limiter.acquire(), range(N)))
+    assert MIN_ELAPSED <= time.perf_counter() - start < MIN_ELAPSED * 3
+
+
+def test_async():
+    limiter = TokenBucket(RATE)
+
+    async def run():
+        await asyncio.gather(*(limiter.acquire_async() for _ in range(N)))
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    assert MIN_ELAPSED <= time.perf_counter() - start < MIN_ELAPSED * 3
+
+
+def test_burst():
+    limiter = TokenBucket(RATE, capacity=5)
+    assert [limiter.reserve() for _ in range(5)] == [0.0] * 5
+    assert limiter.reserve() > 0
+
+
+# 两个连接相当于两个进程
+def test_shared(tmp_path):
+    path = tmp_path / "rate.sqlite"
+    with SharedTokenBucket(path, RATE) as a, SharedTokenBucket(path, RATE) as b:
+        delays = [limiter.reserve() for limiter in (a, b) * 3]
+    assert delays[0] == 0
+    assert delays == sorted(delays)
+    assert delays[-1] == pytest.approx(5 / RATE, abs=0.01)
+
+
+def test_fetch_many(standin):
+    limiter = TokenBucket(RATE)
+
+    async def collect():
+        return [a async for a in fetch_many(standin.url, N, limiter=limiter)]
+
+    start = time.perf_counter()
+    assert len(asyncio.run(collect())) == N
+    assert time.perf_counter() - start >= MIN_ELAPSED
+
+
+# 随机文章的地址不会被缓存，每次都要请求上游，所以每次都要拿到令牌
+def test_fetch_with_cache(standin, tmp_path):
+    limiter = TokenBucket(RATE)
+    with ResponseCache(str(tmp_path / "cache.db")) as cache, create_client() as client:
+        start = time.perf_counter()
+        for _ in range(N):
+            fetch(standin.url, client, cache, limiter=limiter)
+        assert time.perf_counter() - start >= MIN_ELAPSED
+
+
+# 随机文章的接口会重定向，每一跳都要消耗一个令牌，上游收到的请求数不能超过速率
+def test_redirects_consume_tokens(standin):
+    standin.redirect = True
+    limiter = TokenBucket(RATE)
+    n = (N + 1) // 2
+    with create_client() as client:
+        start = time.perf_counter()
+        for _ in range(n):
+            fetch(standin.url, client, limiter=limiter)
+        elapsed = time.perf_counter() - start
+    assert standin.requests == 2 * n
+    assert elapsed >= (standin.requests - 1) / RATE * 0.9
+
+
+def test_invalid_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
@@ -0,0 +1,42 @@
+import io
+
+import pytest
+from factory import Faker
+from rich.console import Console
+
+from ch6.random_wikipedia_article import Article, show, show_many
+from tests.standin import ArticleFactory
+
+
+articles = [
+    Article(),
+    Article("test"),
+    Article("Lorem Ipsum", "Lorem ipsum dolor sit amet."),
+    Article("x" * 100, "  leading and trailing  \n\n" + "y" * 150 + " z"),
+    Article("Zürich", "Zürich ist die größte Stadt der Schweiz."),
+    Article("[bold]Markup[/bold]", "An emoji :smile: here."),
+    *ArticleFactory.build_batch(20, summary=Faker("paragraph", nb_sentences=12)),
+]
+
+
+# 和之前直接使用Rich的实现的输出进行比较
+def rich_show(article):
+    file = io.StringIO()
+    console = Console(file=file, width=72, highlight=False)
+    console.print(article.title, style="bold")
+    if article.summary:
+        console.print(f"\n{article.summary}")
+    return file.getvalue()
+
+
+@pytest.mark.parametrize("article", articles)
+def test_show_matches_rich(article):
+    file = io.StringIO()
+    show(article, file)
+    assert file.getvalue() == rich_show(article)
+
+
+def test_show_many():
+    file = io.StringIO()
+    show_many(articles, file)
+    assert file.getvalue() == "".join(rich_show(article) for article in articles)
@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import time
+from email.utils import formatdate
+
+import httpx
+import pytest
+from pytest_httpserver import HTTPServer
+from werkzeug import Request, Response
+
+from ch6.cache import ResponseCache
+from ch6.random_wikipedia_article import (
+    Article,
+    create_async_client,
+    create_client,
+    fetch,
+    fetch_async,
+)
+from ch6.retry import RetryPolicy, parse_retry_after
+
+article = Article("Lorem Ipsum", "Lorem ipsum dolor sit amet.")
+BODY = '{"title": "Lorem Ipsum", "extract": "Lorem ipsum dolor sit amet."}'
+
+
+# 对冲请求需要服务器能同时处理多个请求，整个模块共用一个服务器
+@pytest.fixture(scope="module")
+def threaded_server():
+    server = HTTPServer(threaded=True)
+    server.start()
+    yield server
+    server.stop()
+
+
+# 按顺序返回给定的响应，数字表示延迟这么多秒之后正常返回
+@pytest.fixture
+def respond(threaded_server: HTTPServer):
+    def f(*responses):
+        queue = list(responses)
+
+        def handler(request: Request) -> Response:
+            item = queue.pop(0) if queue else 0
+            if isinstance(item, Response):
+                return item
+            time.sleep(item)
+            return Response(BODY, content_type="application/json")
+
+        threaded_server.expect_request("/").respond_with_handler(handler)
+        return threaded_server.url_for("/")
+
+    yield f
+    threaded_server.clear()
+
+
+def test_retry(respond):
+    url = respond(
+        Response(status=503), Response(status=429, headers={"Retry-After": "0"})
+    )
+    assert fetch(url, retry=RetryPolicy(backoff=0.01)) == article
+
+
+def test_retry_with_cache(respond, tmp_path):
+    url = respond(Response(status=503), Response(status=502))
+    with ResponseCache(str(tmp_path / "cache.db")) as cache:
+        assert fetch(url, cache=cache, retry=RetryPolicy(backoff=0.01)) == article
+
+
+def test_give_up(respond):
+    url = respond(*[Response(status=500)] * 3)
+    with pytest.raises(httpx.HTTPStatusError):
+        fetch(url, retry=RetryPolicy(attempts=2, backoff=0.01))
+
+
+def test_retry_after_too_long(respond):
+    url = respond(Response(status=429, headers={"Retry-After": "3600"}))
+    start = time.perf_counter()
+    with pytest.raises(httpx.HTTPStatusError):
+        fetch(url)
+    assert time.perf_counter() - start < 1
+
+
+def test_retry_timeout(respond):
+    url = respond(1)
+    with create_client(read_timeout=0.2) as client:
+        assert fetch(url, client, retry=RetryPolicy(backoff=0.01)) == article
+
+
+def test_hedge(respond):
+    url = respond(1)
+    policy = RetryPolicy(attempts=1, hedge=True, hedge_after=0.1)
+    start = time.perf_counter()
+    with create_client() as client:
+        assert fetch(url, client, retry=policy) == article
+        # 输掉的请求还在后台运行，但它的线程不会阻止解释器退出
+        hedges = [t for t in threading.enumerate() if t.name == "hedge"]
+        assert hedges and all(t.daemon for t in hedges)
+    assert time.perf_counter() - start < 0.8
+
+
+def test_hedge_async(respond):
+    url = respond(1)
+    policy = RetryPolicy(attempts=1, hedge=True, hedge_after=0.1)
+
+    async def run():
+        async with create_async_client() as client:
+            return await fetch_async(url, client, policy)
+
+    start = time.perf_counter()
+    assert asyncio.run(run()) == article
+    assert time.perf_counter() - start < 0.8
+
+
+def test_delay():
+    policy = RetryPolicy(attempts=5, backoff=1.0, max_backoff=3.0)
+    assert all(0 <= policy.delay(3) <= 3.0 for _ in range(100))
+    assert policy.delay(4) is None
+    assert policy.delay(0, httpx.Response(503, headers={"Retry-After": "2"})) == 2
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120
+    assert 55 < parse_retry_after(formatdate(time.time() + 60, usegmt=True)) <= 60
+    assert parse_retry_after("soon") is None
+
+
+def test_hedge_delay_uses_p95():
+    policy = RetryPolicy(hedge_after=5.0)
+    assert policy.hedge_delay() == 5.0
+    for i in range(100):
+        policy.latency.observe(i / 100)
+    assert policy.hedge_delay() == 0.95
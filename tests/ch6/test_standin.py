@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from ch6.random_wikipedia_article import create_client, fetch, fetch_many
+from ch6.retry import RetryPolicy
+from ch6.standin import Faults
+
+
+def test_fetch(standin):
+    assert fetch(standin.url) in standin.articles
+
+
+def test_redirect(standin):
+    standin.redirect = True
+    with create_client() as client:
+        response = client.get(standin.url)
+        assert response.status_code == 302
+        assert fetch(standin.url, client) in standin.articles
+    assert standin.requests == 3
+
+
+def test_keep_alive(standin):
+    with create_client() as client:
+        for _ in range(20):
+            fetch(standin.url, client)
+    assert standin.requests == 20
+    # 所有请求都使用同一个连接
+    assert standin.connections == 1
+
+
+def test_errors(standin):
+    standin.faults = Faults(error_rate=1.0, error_status=429, retry_after=2)
+    with create_client() as client:
+        response = client.get(standin.url)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+    with pytest.raises(httpx.HTTPStatusError):
+        fetch(standin.url, retry=RetryPolicy(attempts=1))
+
+
+def test_concurrent(standin):
+    standin.faults = Faults(latency=0.05)
+
+    async def collect():
+        return [article async for article in fetch_many(standin.url, 50, 50)]
+
+    start = time.perf_counter()
+    articles = asyncio.run(collect())
+    elapsed = time.perf_counter() - start
+    assert len(articles) == 50
+    assert standin.requests == 50
+    # 请求确实是同时处理的，依次处理至少需要2.5秒
+    assert standin.max_active >= 10
+    assert elapsed < 1.5
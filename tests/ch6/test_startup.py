@@ -0,0 +1,16 @@
+import subprocess
+import sys
+
+# 导入模块的时候不应该导入httpx，rich和asyncio，它们只在用到的时候导入
+CODE = """
+import sys
+import ch6.random_wikipedia_article
+print(" ".join(m for m in ("httpx", "rich", "asyncio") if m in sys.modules))
+"""
+
+
+def test_import_is_lazy():
+    result = subprocess.run(
+        [sys.executable, "-c", CODE], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
@@ -0,0 +1,49 @@
+import asyncio
+import random
+
+import pytest
+
+from ch6.random_wikipedia_article import create_client, fetch, fetch_many, main
+from ch6.stats import FetchStats, Histogram
+
+
+def test_histogram_percentiles():
+    rng = random.Random(0)
+    values = [rng.lognormvariate(-7, 1) for _ in range(10_000)]
+    histogram = Histogram()
+    for value in values:
+        histogram.record(value)
+    values.sort()
+    for q in (50, 95, 99):
+        exact = values[int(q / 100 * len(values)) - 1]
+        assert histogram.percentile(q) == pytest.approx(exact, rel=0.02)
+    assert histogram.percentile(100) == pytest.approx(values[-1], rel=1e-6)
+
+
+def test_fetch_stats(standin):
+    stats = FetchStats()
+    with create_client(stats=stats) as client:
+        for _ in range(5):
+            fetch(standin.url, client)
+    summary = stats.summary()
+    for phase in ("pool", "ttfb", "download", "decode", "construct", "total"):
+        assert summary[phase]["count"] == 5
+    assert summary["connect"]["count"] == 1
+    assert summary["total"]["p50"] <= summary["total"]["p99"]
+
+
+def test_fetch_many_stats(standin):
+    stats = FetchStats()
+
+    async def collect():
+        return [a async for a in fetch_many(standin.url, 5, stats=stats)]
+
+    asyncio.run(collect())
+    assert stats.summary()["total"]["count"] == 5
+
+
+def test_main_stats(standin, capsys):
+    main(["--url", standin.url, "--count", "2", "--stats"])
+    report = capsys.readouterr().err
+    assert "p95" in report
+    assert "render" in report
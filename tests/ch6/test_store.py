@@ -0,0 +1,73 @@
+import pytest
+
+from ch6.random_wikipedia_article import Article, main
+from ch6.store import ArticleStore
+
+articles = [
+    Article("Python (programming language)", "Python is a programming language."),
+    Article("Monty Python", "Monty Python were a British comedy troupe."),
+    Article("Ball python", "The ball python is a snake native to Africa."),
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ArticleStore(tmp_path / "articles.sqlite", batch_size=2) as store:
+        store.add_many(articles)
+        yield store
+
+
+def test_get(store):
+    assert store.get("Monty Python") == articles[1]
+    assert store.get("Missing") is None
+
+
+def test_dedup_by_title(store):
+    updated = Article("Monty Python", "Monty Python is a comedy group.")
+    store.add_many([articles[1], updated])
+    assert len(store) == 3
+    assert store.get("Monty Python") == updated
+    assert store.search("troupe") == []
+    assert store.search("group") == [updated]
+
+
+def test_search(store):
+    assert store.search("snake") == [articles[2]]
+    # 标题中的匹配排在前面
+    assert store.search("python")[0] == articles[0]
+    assert store.search("comedy python") == [articles[1]]
+    assert store.search('"unbalanced -') == []
+    assert store.search("Python NOT comedy", raw=True)[-1] == articles[2]
+
+
+def test_wal(store, tmp_path):
+    with ArticleStore(tmp_path / "articles.sqlite") as reader:
+        assert reader._db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert len(reader) == 3
+
+
+def test_main_store_and_search(standin, tmp_path, capsys):
+    path = str(tmp_path / "articles.sqlite")
+    main(["--url", standin.url, "--count", "5", "--store", path])
+    fetched = capsys.readouterr().out
+    with ArticleStore(path) as store:
+        stored = [store.get(a.title) for a in standin.articles]
+    assert 0 < sum(a is not None for a in stored) <= 5
+    found = next(a for a in stored if a is not None)
+    assert found.title in fetched
+
+    main(["--store", path, "--search", found.title.split()[0]])
+    assert found.title in capsys.readouterr().out
+
+
+def test_main_search_limit(tmp_path, capsys):
+    path = tmp_path / "articles.sqlite"
+    with ArticleStore(path) as store:
+        store.add_many(articles)
+    main(["--store", str(path), "--search", "python"])
+    output = capsys.readouterr().out
+    assert all(article.title in output for article in articles)
+
+    main(["--store", str(path), "--search", "python", "--limit", "1"])
+    output = capsys.readouterr().out
+    assert sum(article.title in output for article in articles) == 1
@@ -0,0 +1,37 @@
+import hashlib
+
+import pytest
+
+from ch9.formatter import frobnicate
+from ch9.hashing import LARGE_INPUT, hash_file, hash_files, hash_many
+
+values = ["first test value", "another test value", "and here's another one"]
+
+
+def test_hash_many_matches_frobnicate():
+    assert hash_many(values) == [frobnicate(value) for value in values]
+
+
+@pytest.mark.parametrize("algo", ["md5", "sha256", "blake2b"])
+def test_hash_many_large_inputs(algo):
+    data = [b"small", b"x" * (LARGE_INPUT + 1), "zürich"]
+    expected = [
+        hashlib.new(
+            algo, value if isinstance(value, bytes) else value.encode()
+        ).hexdigest()
+        for value in data
+    ]
+    assert hash_many(data, algo) == expected
+
+
+def test_hash_many_unknown_algorithm():
+    with pytest.raises(ValueError):
+        hash_many(values, "sha1")
+
+
+def test_hash_file(tmp_path):
+    path = tmp_path / "data"
+    path.write_bytes(b"0123456789" * 1000)
+    expected = hashlib.sha256(path.read_bytes()).hexdigest()
+    assert hash_file(path, "sha256", chunk_size=64) == expected
+    assert hash_files([path, path], "sha256") == [expected, expected]
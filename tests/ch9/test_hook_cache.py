@@ -0,0 +1,73 @@
+import sys
+
+from ch9.hook_cache import Hook, HookCache, run_hook
+
+# 记录被检查的文件，内容中包含bad的文件检查失败
+CHECK = """
+import sys
+with open(sys.argv[1], "a") as log:
+    log.write("\\n".join(sys.argv[2:]) + "\\n")
+sys.exit(any("bad" in open(name).read() for name in sys.argv[2:]))
+"""
+
+
+def make_hook(tmp_path, version="1.0"):
+    log = tmp_path / "checked.log"
+    return Hook("check", version, (sys.executable, "-c", CHECK, str(log))), log
+
+
+def checked(log):
+    lines = log.read_text().split() if log.exists() else []
+    log.unlink(missing_ok=True)
+    return sorted(lines)
+
+
+def test_only_changed_files_are_checked(tmp_path):
+    files = [tmp_path / f"{name}.py" for name in "abc"]
+    for file in files:
+        file.write_text(f"# {file.name}\n")
+    names = [str(file) for file in files]
+    hook, log = make_hook(tmp_path)
+
+    with HookCache(tmp_path / "cache.sqlite") as cache:
+        assert run_hook(hook, names, cache).ok
+        assert checked(log) == sorted(names)
+
+        assert run_hook(hook, names, cache).ok
+        assert checked(log) == []
+
+        files[1].write_text("bad\n")
+        assert not run_hook(hook, names, cache).ok
+        assert checked(log) == [names[1]]
+        assert not run_hook(hook, names, cache).ok
+        assert checked(log) == [names[1]]
+
+        # 新的版本或者参数之前的结果都无效
+        hook, log = make_hook(tmp_path, "2.0")
+        files[1].write_text("good\n")
+        assert run_hook(hook, names, cache).ok
+        assert checked(log) == sorted(names)
+
+
+def test_eviction(tmp_path):
+    hook, _ = make_hook(tmp_path)
+    with HookCache(tmp_path / "cache.sqlite", max_entries=3) as cache:
+        for i in range(5):
+            cache.record(hook, [bytes([i])])
+        assert len(cache) == 3
+        assert cache.passed(hook, [bytes([i]) for i in range(5)]) == {
+            b"\x02",
+            b"\x03",
+            b"\x04",
+        }
+
+
+# 同一批记录的使用时间相同，也要按照上限淘汰
+def test_eviction_within_batch(tmp_path):
+    hook, _ = make_hook(tmp_path)
+    with HookCache(tmp_path / "cache.sqlite", max_entries=3) as cache:
+        cache.record(hook, [bytes([i]) for i in range(5)])
+        assert len(cache) == 3
+        cache.record(hook, [b"\x10", b"\x11"])
+        assert len(cache) == 3
+        assert cache.passed(hook, [b"\x10", b"\x11"]) == {b"\x10", b"\x11"}
@@ -0,0 +1,71 @@
+import sys
+import time
+
+import pytest
+
+from ch9.runner import Job, build_command, run_jobs
+
+
+def python(code, **kwargs):
+    return Job((sys.executable, "-c", code), **kwargs)
+
+
+def test_build_command_does_not_share_state():
+    assert build_command("myscript.py", force=True) == ("myscript.py", "--force")
+    assert build_command("myscript.py") == ("myscript.py",)
+
+
+def test_run_jobs():
+    lines = []
+    report = run_jobs(
+        [
+            python("print('out')"),
+            python("import sys; print('err', file=sys.stderr); sys.exit(3)"),
+        ],
+        max_parallel=2,
+        on_output=lambda job, stream, line: lines.append((stream, line)),
+    )
+    first, second = report.results
+    assert (first.ok, first.stdout) == (True, "out\n")
+    assert (second.returncode, second.stderr) == (3, "err\n")
+    assert report.returncode == 3
+    assert sorted(lines) == [("stderr", "err\n"), ("stdout", "out\n")]
+
+
+def test_timeout():
+    report = run_jobs([python("import time; time.sleep(10)", timeout=0.5)])
+    assert report.results[0].timed_out
+    assert not report.ok
+    assert report.returncode == 124
+
+
+def test_killed_by_signal():
+    report = run_jobs(
+        [python("import os, signal; os.kill(os.getpid(), signal.SIGTERM)")]
+    )
+    assert report.results[0].returncode == -15
+    assert report.returncode == 128 + 15
+
+
+def test_missing_command():
+    report = run_jobs([Job(["does-not-exist-command"])])
+    assert report.returncode == 127
+
+
+def test_long_lines():
+    code = "import sys; print('x' * 200_000); sys.stdout.write('é' * 40_000)"
+    report = run_jobs([python(code, timeout=10)])
+    result = report.results[0]
+    assert result.ok
+    assert result.stdout == "x" * 200_000 + "\n" + "é" * 40_000
+
+
+def test_failing_callback_kills_process():
+    def on_output(job, stream, line):
+        raise RuntimeError(line)
+
+    code = "import time; print('ready', flush=True); time.sleep(10)"
+    start = time.perf_counter()
+    with pytest.raises(RuntimeError):
+        run_jobs([python(code)], on_output=on_output)
+    assert time.perf_counter() - start < 5
@@ -0,0 +1,33 @@
+import pytest
+
+from ch6.standin import StandinServer, serve
+from tests.standin import build_articles
+
+
+# 整个测试会话只启动一次服务器，每个测试结束后恢复默认的配置
+@pytest.fixture(scope="session")
+def standin_server():
+    with serve(build_articles(100, seed=0)) as server:
+        yield server
+
+
+@pytest.fixture
+def standin(standin_server: StandinServer):
+    yield standin_server
+    standin_server.reset()
+
+
+# 检查处理每篇文章的内存峰值和没有释放的内存是否超过预算
+# memory_budget(url, peak=256 * 1024, leaked=1024)
+@pytest.fixture
+def memory_budget():
+    import io
+
+    from ch6.memory import check_budget, measure
+
+    def check(url, peak=None, leaked=None, n=50):
+        report = measure(url, n, file=io.StringIO())
+        check_budget(report, peak, leaked)
+        return report
+
+    return check
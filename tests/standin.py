@@ -0,0 +1,22 @@
+from typing import Optional
+
+from factory import Factory, Faker
+from factory.random import reseed_random
+
+from ch6.random_wikipedia_article import Article
+
+# 测试中使用的文章，替身服务器本身在ch6/standin.py中
+
+
+class ArticleFactory(Factory):
+    class Meta:
+        model = Article
+
+    title = Faker("sentence")
+    summary = Faker("paragraph")
+
+
+def build_articles(n: int, seed: Optional[int] = None) -> list[Article]:
+    if seed is not None:
+        reseed_random(seed)
+    return ArticleFactory.build_batch(n)